@@ -0,0 +1,63 @@
+import time
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Tuple
+from app.core.database import db
+
+# Seconds a per-date result is kept: a past day's emails rarely change, today's keep arriving.
+# Writes from this process bump db.email_generation and are seen at once either way.
+PAST_DATE_TTL = 86400
+TODAY_TTL = 60
+MAX_ENTRIES = 1024
+
+# (name, date) -> (database, its email_generation, expiry on the monotonic clock, result)
+_CACHE: Dict[Tuple[str, str], Tuple[Any, int, float, Any]] = {}
+_lock = threading.Lock()
+
+# key -> result of the computation currently running for it on the event loop
+_inflight: Dict[str, asyncio.Future] = {}
+
+def cached_by_date(name: str, date_str: str, compute: Callable[[], Any]) -> Any:
+    """Get name's result for date_str, calling compute only when no fresh copy is cached"""
+    key = (name, date_str)
+    now = time.monotonic()
+    with _lock:
+        entry = _CACHE.get(key)
+    if entry is not None and entry[0] is db and entry[1] == db.email_generation and now < entry[2]:
+        return entry[3]
+
+    # Read the generation first so a write during compute forces another run
+    generation = db.email_generation
+    result = compute()
+    ttl = TODAY_TTL if date_str >= datetime.now().strftime('%Y-%m-%d') else PAST_DATE_TTL
+
+    with _lock:
+        _CACHE.pop(key, None)
+        if len(_CACHE) >= MAX_ENTRIES:
+            # Evict the oldest insertion
+            del _CACHE[next(iter(_CACHE))]
+        _CACHE[key] = (db, generation, now + ttl, result)
+    return result
+
+async def single_flight(key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Await compute(), sharing its result with any caller that asks for key while it runs"""
+    future = _inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await compute()
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        # Mark it retrieved so a failure nobody else waited for isn't logged twice
+        future.exception()
+        raise
+    finally:
+        _inflight.pop(key, None)
+        if not future.done():
+            future.cancel()
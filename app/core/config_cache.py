@@ -0,0 +1,30 @@
+import time
+import threading
+from typing import Any, Dict, Optional, Tuple
+from app.core.database import db
+
+# Seconds a stored configuration is served from memory; this process's writes bump
+# db.config_generation and are seen at once, the TTL bounds staleness from other processes
+TTL = 30
+
+# config_type -> (database, its config_generation, monotonic read time, stored config)
+_CACHE: Dict[str, Tuple[Any, int, float, Optional[Dict[str, Any]]]] = {}
+_lock = threading.Lock()
+
+def get_cached(config_type: str) -> Optional[Dict[str, Any]]:
+    """Get a stored configuration, reading the database only when the cached copy is stale"""
+    with _lock:
+        entry = _CACHE.get(config_type)
+
+    now = time.monotonic()
+    if entry is None or entry[0] is not db or entry[1] != db.config_generation or now - entry[2] >= TTL:
+        # Read the generation first so a write during the query forces another reload
+        generation = db.config_generation
+        config = db.get_configuration(config_type)
+        with _lock:
+            _CACHE[config_type] = (db, generation, now, config)
+    else:
+        config = entry[3]
+
+    # Callers get their own copy so the cached one is never modified
+    return dict(config) if config else config
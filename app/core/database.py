@@ -1,19 +1,78 @@
 import sqlite3
 import json
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterator
 import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson:
+    def _dumps(obj: Any) -> str:
+        # Summaries key their breakdowns by the str-based category/priority enums
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    _loads = orjson.loads
+else:
+    _dumps = json.dumps
+    _loads = json.loads
+
+# Bump when init_database gains new DDL so existing files pick it up
+SCHEMA_VERSION = 3
+
+EMAIL_COLUMNS = (
+    "id, subject, sender, sender_email, received_at, category, priority, summary, "
+    "is_read, is_replied, urgency_score, action_required, follow_up_suggestions"
+)
+
+# ORDER BY clauses accepted by get_emails_filtered
+EMAIL_ORDERINGS = {
+    'newest': "received_at DESC, id DESC",
+    'oldest': "received_at, id",
+    'urgency': "urgency_score DESC, received_at DESC, id DESC"
+}
+
+# Columns count_emails_by may group on
+GROUPABLE_COLUMNS = frozenset({'category', 'priority'})
+
 class Database:
     def __init__(self, db_path: str = "email_agent.db"):
         self.db_path = db_path
+        self._local = threading.local()
+        # Bumped on every VIP write so in-process VIP caches can tell they are stale
+        self.vip_generation = 0
+        # Bumped on every configuration write, for the same reason
+        self.config_generation = 0
+        # Bumped on every email or daily summary write, for per-date result caches
+        self.email_generation = 0
         self.init_database()
 
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening and tuning it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            self._local.conn = conn
+        return conn
+
     def init_database(self):
         """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
+        # Skip the DDL entirely when this file already has the current schema
+        cursor.execute("PRAGMA user_version")
+        if cursor.fetchone()[0] >= SCHEMA_VERSION:
+            return
+        
         # Email summaries table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS email_summaries (
@@ -71,41 +130,88 @@ class Database:
             )
         ''')
         
+        # Indexes for the per-date and per-type lookups; priority and score ride along with
+        # received_at so the urgent-email test is answered from the index, not the table
+        cursor.execute("DROP INDEX IF EXISTS idx_emails_received")
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_emails_received_urgency
+            ON email_summaries(received_at, priority, urgency_score)
+        ''')
+        # Equality on the flag first, then the day's received_at range, for the unread and reminder lists
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_emails_unread
+            ON email_summaries(is_read, received_at)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_emails_reminders
+            ON email_summaries(is_replied, action_required, received_at)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_daily_date
+            ON daily_summaries(date)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_conf_type_updated
+            ON configurations(config_type, updated_at DESC)
+        ''')
+        
+        # OpenAI response cache table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS openai_cache (
+                key BLOB PRIMARY KEY,
+                response TEXT NOT NULL,
+                ttl INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_openai_cache_created
+            ON openai_cache(created_at)
+        ''')
+        
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         conn.commit()
-        conn.close()
 
     def save_email_summary(self, email_summary: Dict[str, Any]):
         """Save email summary to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO email_summaries 
-            (id, subject, sender, sender_email, received_at, category, priority, 
-             summary, is_read, is_replied, urgency_score, action_required, follow_up_suggestions)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            email_summary['id'],
-            email_summary['subject'],
-            email_summary['sender'],
-            email_summary['sender_email'],
-            email_summary['received_at'],
-            email_summary['category'],
-            email_summary['priority'],
-            email_summary['summary'],
-            email_summary['is_read'],
-            email_summary['is_replied'],
-            email_summary['urgency_score'],
-            email_summary['action_required'],
-            json.dumps(email_summary.get('follow_up_suggestions', []))
-        ))
+        self.save_email_summaries([email_summary])
+
+    def save_email_summaries(self, email_summaries: List[Dict[str, Any]]):
+        """Save many email summaries in a single transaction"""
+        rows = [
+            (
+                email_summary['id'],
+                email_summary['subject'],
+                email_summary['sender'],
+                email_summary['sender_email'],
+                email_summary['received_at'],
+                email_summary['category'],
+                email_summary['priority'],
+                email_summary['summary'],
+                email_summary['is_read'],
+                email_summary['is_replied'],
+                email_summary['urgency_score'],
+                email_summary['action_required'],
+                _dumps(email_summary.get('follow_up_suggestions', []))
+            )
+            for email_summary in email_summaries
+        ]
+        if not rows:
+            return
         
-        conn.commit()
-        conn.close()
+        conn = self._conn()
+        with conn:
+            conn.executemany('''
+                INSERT OR REPLACE INTO email_summaries 
+                (id, subject, sender, sender_email, received_at, category, priority, 
+                 summary, is_read, is_replied, urgency_score, action_required, follow_up_suggestions)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        self.email_generation += 1
 
     def save_daily_summary(self, daily_summary: Dict[str, Any]):
         """Save daily summary to database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -116,94 +222,202 @@ class Database:
         ''', (
             daily_summary['date'],
             daily_summary['total_emails'],
-            json.dumps(daily_summary['categories']),
-            json.dumps(daily_summary.get('urgent_emails', [])),
-            json.dumps(daily_summary.get('unread_emails', [])),
-            json.dumps(daily_summary.get('response_reminders', [])),
-            json.dumps(daily_summary['priority_breakdown'])
+            _dumps(daily_summary['categories']),
+            _dumps(daily_summary.get('urgent_emails', [])),
+            _dumps(daily_summary.get('unread_emails', [])),
+            _dumps(daily_summary.get('response_reminders', [])),
+            _dumps(daily_summary['priority_breakdown'])
         ))
         
         conn.commit()
-        conn.close()
+        self.email_generation += 1
+
+    def _day_bounds(self, date: str) -> Optional[tuple]:
+        """Get the [start, end) received_at range covering a YYYY-MM-DD date"""
+        try:
+            start = datetime.strptime(date, '%Y-%m-%d')
+        except ValueError:
+            return None
+        return start.strftime('%Y-%m-%d'), (start + timedelta(days=1)).strftime('%Y-%m-%d')
 
     def get_emails_by_date(self, date: str) -> List[Dict[str, Any]]:
         """Get emails for a specific date"""
-        conn = sqlite3.connect(self.db_path)
+        return list(self.iter_emails_by_date(date))
+
+    def iter_emails_by_date(self, date: str, page_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """Yield emails for a specific date, newest first, one page of rows at a time"""
+        bounds = self._day_bounds(date)
+        if not bounds:
+            return
+        
+        conn = self._conn()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT * FROM email_summaries 
-            WHERE DATE(received_at) = ?
-            ORDER BY received_at DESC
-        ''', (date,))
+        # A range on the raw column can use idx_emails_received_urgency, unlike DATE(received_at).
+        # Pages continue after the last (received_at, id) seen, so ties on received_at are not skipped.
+        last = (None, None)
+        while True:
+            cursor.execute(f'''
+                SELECT {EMAIL_COLUMNS} FROM email_summaries 
+                WHERE received_at >= ? AND received_at < ?
+                  AND (? IS NULL OR (received_at, id) < (?, ?))
+                ORDER BY received_at DESC, id DESC
+                LIMIT ?
+            ''', (*bounds, last[0], last[0], last[1], page_size))
+            
+            rows = cursor.fetchall()
+            for row in rows:
+                yield self._row_to_email(row)
+            
+            if len(rows) < page_size:
+                break
+            last = (rows[-1]['received_at'], rows[-1]['id'])
+
+    def get_emails_filtered(self, date: str, category: Optional[str] = None,
+                            priorities: Optional[List[str]] = None, min_urgency: Optional[float] = None,
+                            is_read: Optional[bool] = None, is_replied: Optional[bool] = None,
+                            action_required: Optional[bool] = None, order_by: str = 'newest',
+                            limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get a date's emails matching the given filters, sorted and limited in SQL.
         
-        rows = cursor.fetchall()
-        conn.close()
-        
-        emails = []
-        for row in rows:
-            emails.append({
-                'id': row[0],
-                'subject': row[1],
-                'sender': row[2],
-                'sender_email': row[3],
-                'received_at': row[4],
-                'category': row[5],
-                'priority': row[6],
-                'summary': row[7],
-                'is_read': bool(row[8]),
-                'is_replied': bool(row[9]),
-                'urgency_score': row[10],
-                'action_required': bool(row[11]),
-                'follow_up_suggestions': json.loads(row[12]) if row[12] else []
-            })
-        
-        return emails
+        priorities and min_urgency together match emails meeting either one, the urgent-email test.
+        """
+        bounds = self._day_bounds(date)
+        if not bounds:
+            return []
+        
+        clauses = ["received_at >= ? AND received_at < ?"]
+        params: List[Any] = list(bounds)
+        
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        
+        for column, value in (('is_read', is_read), ('is_replied', is_replied), ('action_required', action_required)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        
+        urgent = []
+        if priorities:
+            urgent.append(f"priority IN ({', '.join('?' * len(priorities))})")
+            params.extend(priorities)
+        if min_urgency is not None:
+            urgent.append("urgency_score >= ?")
+            params.append(min_urgency)
+        if urgent:
+            clauses.append(f"({' OR '.join(urgent)})")
+        
+        # SQLite treats a negative LIMIT as no limit
+        params.append(-1 if limit is None else limit)
+        
+        cursor = self._conn().cursor()
+        cursor.execute(f'''
+            SELECT {EMAIL_COLUMNS} FROM email_summaries
+            WHERE {' AND '.join(clauses)}
+            ORDER BY {EMAIL_ORDERINGS[order_by]}
+            LIMIT ?
+        ''', params)
+        
+        return [self._row_to_email(row) for row in cursor.fetchall()]
+
+    def count_emails_by(self, date: str, column: str) -> Dict[str, int]:
+        """Count a date's emails per category or priority"""
+        if column not in GROUPABLE_COLUMNS:
+            raise ValueError(f"Cannot group emails by {column}")
+        
+        bounds = self._day_bounds(date)
+        if not bounds:
+            return {}
+        
+        cursor = self._conn().cursor()
+        cursor.execute(f'''
+            SELECT {column}, COUNT(*) FROM email_summaries
+            WHERE received_at >= ? AND received_at < ?
+            GROUP BY {column}
+        ''', bounds)
+        
+        return {row[0]: row[1] for row in cursor.fetchall()}
+
+    def get_emails_by_ids(self, ids: List[str], chunk_size: int = 500) -> Dict[str, Dict[str, Any]]:
+        """Get the stored email summaries among ids, keyed by id"""
+        conn = self._conn()
+        cursor = conn.cursor()
+        
+        found = {}
+        # Chunked to stay under SQLite's bound-parameter limit
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f'SELECT {EMAIL_COLUMNS} FROM email_summaries WHERE id IN ({placeholders})', chunk)
+            for row in cursor.fetchall():
+                found[row['id']] = self._row_to_email(row)
+        
+        return found
+
+    def _row_to_email(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert an email_summaries row to an email summary dict"""
+        return {
+            'id': row['id'],
+            'subject': row['subject'],
+            'sender': row['sender'],
+            'sender_email': row['sender_email'],
+            'received_at': row['received_at'],
+            'category': row['category'],
+            'priority': row['priority'],
+            'summary': row['summary'],
+            'is_read': bool(row['is_read']),
+            'is_replied': bool(row['is_replied']),
+            'urgency_score': row['urgency_score'],
+            'action_required': bool(row['action_required']),
+            'follow_up_suggestions': _loads(row['follow_up_suggestions']) if row['follow_up_suggestions'] else []
+        }
 
     def get_daily_summary(self, date: str) -> Optional[Dict[str, Any]]:
         """Get daily summary for a specific date"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
         cursor.execute('''
-            SELECT * FROM daily_summaries 
+            SELECT id, date, total_emails, categories, urgent_emails, unread_emails,
+                   response_reminders, priority_breakdown
+            FROM daily_summaries 
             WHERE date = ?
             ORDER BY created_at DESC
             LIMIT 1
         ''', (date,))
         
         row = cursor.fetchone()
-        conn.close()
         
         if row:
             return {
-                'id': row[0],
-                'date': row[1],
-                'total_emails': row[2],
-                'categories': json.loads(row[3]),
-                'urgent_emails': json.loads(row[4]) if row[4] else [],
-                'unread_emails': json.loads(row[5]) if row[5] else [],
-                'response_reminders': json.loads(row[6]) if row[6] else [],
-                'priority_breakdown': json.loads(row[7])
+                'id': row['id'],
+                'date': row['date'],
+                'total_emails': row['total_emails'],
+                'categories': _loads(row['categories']),
+                'urgent_emails': _loads(row['urgent_emails']) if row['urgent_emails'] else [],
+                'unread_emails': _loads(row['unread_emails']) if row['unread_emails'] else [],
+                'response_reminders': _loads(row['response_reminders']) if row['response_reminders'] else [],
+                'priority_breakdown': _loads(row['priority_breakdown'])
             }
         return None
 
     def save_configuration(self, config_type: str, config_data: Dict[str, Any]):
         """Save configuration to database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
         cursor.execute('''
             INSERT OR REPLACE INTO configurations (config_type, config_data, updated_at)
             VALUES (?, ?, ?)
-        ''', (config_type, json.dumps(config_data), datetime.now().isoformat()))
+        ''', (config_type, _dumps(config_data), datetime.now().isoformat()))
         
         conn.commit()
-        conn.close()
+        self.config_generation += 1
 
     def get_configuration(self, config_type: str) -> Optional[Dict[str, Any]]:
         """Get configuration from database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -214,15 +428,14 @@ class Database:
         ''', (config_type,))
         
         row = cursor.fetchone()
-        conn.close()
         
         if row:
-            return json.loads(row[0])
+            return _loads(row['config_data'])
         return None
 
     def add_vip_contact(self, email: str, name: str = None, priority_level: str = "high"):
         """Add VIP contact"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -231,22 +444,66 @@ class Database:
         ''', (email, name, priority_level))
         
         conn.commit()
-        conn.close()
+        self.vip_generation += 1
 
     def get_vip_contacts(self) -> List[Dict[str, Any]]:
         """Get all VIP contacts"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
         cursor.execute('SELECT email, name, priority_level FROM vip_contacts')
         rows = cursor.fetchall()
-        conn.close()
         
-        return [{'email': row[0], 'name': row[1], 'priority_level': row[2]} for row in rows]
+        return [dict(row) for row in rows]
+
+    def get_cached_response(self, key: bytes) -> Optional[str]:
+        """Get a cached OpenAI response if it has not expired"""
+        conn = self._conn()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT response FROM openai_cache
+            WHERE key = ?
+            AND (ttl IS NULL OR created_at > datetime('now', '-' || ttl || ' seconds'))
+        ''', (key,))
+        
+        row = cursor.fetchone()
+        
+        if row:
+            return row['response']
+        return None
+
+    def save_cached_response(self, key: bytes, response: str, ttl: Optional[int] = None):
+        """Save an OpenAI response to the cache"""
+        conn = self._conn()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT OR REPLACE INTO openai_cache (key, response, ttl, created_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (key, response, ttl))
+        
+        conn.commit()
+
+    def purge_expired_responses(self) -> int:
+        """Delete expired OpenAI cache entries and return how many were removed"""
+        conn = self._conn()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            DELETE FROM openai_cache
+            WHERE ttl IS NOT NULL
+            AND created_at <= datetime('now', '-' || ttl || ' seconds')
+        ''')
+        removed = cursor.rowcount
+        
+        conn.commit()
+        
+        return removed
 
 # Global database instance
 db = Database()
 
 async def init_db():
-    """Initialize database on startup"""
-    db.init_database() 
\ No newline at end of file
+    """Startup hook; the global db above already initialized the schema on import"""
+    pass 
\ No newline at end of file
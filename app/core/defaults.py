@@ -0,0 +1,37 @@
+from types import MappingProxyType
+
+# Defaults served and restored by the config endpoints. Read-only views, so copy with
+# dict() before changing or storing one; the lists are tuples so copies share nothing mutable.
+
+EMAIL_DEFAULTS = MappingProxyType({
+    "email_address": "",
+    "password": "",
+    "imap_server": "imap.gmail.com",
+    "imap_port": 993,
+    "smtp_server": "smtp.gmail.com",
+    "smtp_port": 587,
+    "use_ssl": True,
+    "vip_contacts": (),
+    "auto_categorize": True,
+    "daily_summary_time": "09:00",
+    "response_reminder_hours": 24,
+    "follow_up_reminder_days": 3
+})
+
+NOTIFICATION_DEFAULTS = MappingProxyType({
+    "slack_webhook_url": "",
+    "telegram_bot_token": "",
+    "telegram_chat_id": "",
+    "whatsapp_webhook_url": "",
+    "enable_voice_summary": False,
+    "notification_channels": ()
+})
+
+SYSTEM_DEFAULTS = MappingProxyType({
+    "auto_start": True,
+    "log_level": "INFO",
+    "max_emails_per_batch": 50,
+    "retention_days": 30,
+    "backup_enabled": False,
+    "backup_frequency": "daily"
+})
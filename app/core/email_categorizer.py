@@ -1,14 +1,147 @@
 import re
-from typing import List, Dict, Any
+import threading
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from app.models import EmailCategory
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Keyword categories in the order categorize_email checks them
+CATEGORY_PRIORITY = (
+    EmailCategory.URGENT,
+    EmailCategory.MEETINGS,
+    EmailCategory.DEADLINES,
+    EmailCategory.WORK,
+    EmailCategory.PERSONAL,
+    EmailCategory.PROMOTIONS,
+    EmailCategory.SOCIAL
+)
+CATEGORY_RANK = {category: rank for rank, category in enumerate(CATEGORY_PRIORITY)}
+
+# Categorized emails remembered by categorize_email
+CATEGORY_CACHE_SIZE = 4096
+
+# Patterns used by extract_category_features
+_DIGIT_RE = re.compile(r'\d')
+_DATE_RE = re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}')
+_TIME_RE = re.compile(r'\d{1,2}:\d{2}')
+_URL_RE = re.compile(r'http[s]?://')
+_EMAIL_RE = re.compile(r'\S+@\S+')
+
+# Work domains
+_WORK_DOMAINS = frozenset({
+    'gmail.com', 'outlook.com', 'hotmail.com', 'yahoo.com',
+    'company.com', 'corp.com', 'business.com', 'enterprise.com'
+})
+
+# Social media domains
+_SOCIAL_DOMAINS = frozenset({
+    'facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com',
+    'snapchat.com', 'tiktok.com', 'pinterest.com'
+})
+
+# Promotional domains
+_PROMO_DOMAINS = frozenset({
+    'amazon.com', 'ebay.com', 'etsy.com', 'shopify.com',
+    'mailchimp.com', 'constantcontact.com', 'sendgrid.com',
+    'salesforce.com', 'hubspot.com', 'marketing.com'
+})
+
+@lru_cache(maxsize=8192)
+def _domain_category(domain: str) -> EmailCategory:
+    """Map a lowercased sender domain to its category"""
+    if domain in _WORK_DOMAINS:
+        return EmailCategory.WORK
+    elif domain in _SOCIAL_DOMAINS:
+        return EmailCategory.SOCIAL
+    elif domain in _PROMO_DOMAINS:
+        return EmailCategory.PROMOTIONS
+    
+    return EmailCategory.OTHER
+
+class _S3FIFOCache:
+    """Bounded S3-FIFO cache: one-hit entries leave through a small queue without flushing hot ones"""
+    
+    def __init__(self, maxsize: int):
+        self.small_size = max(1, maxsize // 10)
+        self.main_size = max(1, maxsize - self.small_size)
+        # key -> [value, freq]; the queues below hold keys in insertion order
+        self._entries = {}
+        self._small = OrderedDict()
+        self._main = OrderedDict()
+        # Keys recently evicted from the small queue, admitted straight to main if seen again
+        self._ghost = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        entry[1] = min(entry[1] + 1, 3)
+        return entry[0]
+    
+    def put(self, key, value):
+        """Cache value under key, evicting as needed"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[0] = value
+            return
+        
+        self._entries[key] = [value, 0]
+        if key in self._ghost:
+            del self._ghost[key]
+            self._main[key] = None
+        else:
+            self._small[key] = None
+        
+        while len(self._small) > self.small_size:
+            old, _ = self._small.popitem(last=False)
+            if self._entries[old][1]:
+                self._entries[old][1] = 0
+                self._main[old] = None
+            else:
+                del self._entries[old]
+                self._ghost[old] = None
+                if len(self._ghost) > self.main_size:
+                    self._ghost.popitem(last=False)
+        
+        while len(self._main) > self.main_size:
+            old, _ = self._main.popitem(last=False)
+            if self._entries[old][1]:
+                # Reinsert with one less use, like a CLOCK hand passing over it
+                self._entries[old][1] -= 1
+                self._main[old] = None
+            else:
+                del self._entries[old]
+    
+    def clear(self):
+        """Drop all entries and ghosts"""
+        self._entries.clear()
+        self._small.clear()
+        self._main.clear()
+        self._ghost.clear()
+
 class EmailCategorizer:
     def __init__(self):
         self.category_keywords = self._initialize_keywords()
+        self._automaton = self._build_automaton()
+        self._category_res = self._build_category_res()
+        self._category_searches = self._bind_category_searches()
+        # (subject, sender_email, len(body), hash(body)) -> category
+        self._category_cache = _S3FIFOCache(CATEGORY_CACHE_SIZE)
+        self._cache_lock = threading.Lock()
         
     def _initialize_keywords(self) -> Dict[EmailCategory, List[str]]:
         """Initialize keywords for each category"""
-        return {
+        keywords = {
             EmailCategory.WORK: [
                 'project', 'task', 'deadline', 'meeting', 'report', 'presentation',
                 'client', 'customer', 'team', 'collaboration', 'workflow', 'process',
@@ -17,9 +150,9 @@ class EmailCategorizer:
                 'invoice', 'payment', 'budget', 'expense', 'reimbursement'
             ],
             EmailCategory.PERSONAL: [
-                'family', 'friend', 'personal', 'home', 'house', 'family',
+                'family', 'friend', 'personal', 'home', 'house',
                 'birthday', 'anniversary', 'celebration', 'party', 'dinner',
-                'weekend', 'vacation', 'travel', 'trip', 'holiday', 'personal',
+                'weekend', 'vacation', 'travel', 'trip', 'holiday',
                 'health', 'medical', 'doctor', 'appointment', 'insurance'
             ],
             EmailCategory.PROMOTIONS: [
@@ -51,96 +184,171 @@ class EmailCategorizer:
             EmailCategory.DEADLINES: [
                 'deadline', 'due date', 'due', 'submit', 'deliver', 'complete',
                 'finish', 'end date', 'cutoff', 'expiration', 'expires',
-                'last day', 'final', 'closing', 'deadline', 'timeline',
+                'last day', 'final', 'closing', 'timeline',
                 'schedule', 'milestone', 'deliverable', 'target date'
             ]
         }
         
+        return {category: self._normalize_keywords(words) for category, words in keywords.items()}
+
+    @staticmethod
+    def _normalize_keywords(keywords: List[str]) -> List[str]:
+        """Drop duplicate keywords and order the rest longest first, so phrases are tried before their words"""
+        return sorted(set(keywords), key=lambda keyword: (-len(keyword), keyword))
+        
+    def _build_automaton(self):
+        """Build one Aho-Corasick automaton tagging every keyword with the categories that list it
+
+        Each keyword carries a bitmask of its categories, with bit N set for CATEGORY_PRIORITY[N].
+        """
+        if ahocorasick is None:
+            return None
+        
+        tags = {}
+        for category, keywords in self.category_keywords.items():
+            for keyword in keywords:
+                tags.setdefault(keyword, Counter())[category] += 1
+        
+        automaton = ahocorasick.Automaton()
+        for keyword, categories in tags.items():
+            if not keyword:
+                continue
+            mask = 0
+            for category in categories:
+                if category in CATEGORY_RANK:
+                    mask |= 1 << CATEGORY_RANK[category]
+            automaton.add_word(keyword, (keyword, categories, mask))
+        
+        if len(automaton) == 0:
+            return None
+        automaton.make_automaton()
+        return automaton
+
+    def _build_category_res(self) -> Dict[EmailCategory, re.Pattern]:
+        """Compile one alternation per category, used when pyahocorasick is not installed"""
+        if self._automaton is not None:
+            return {}
+        
+        return {
+            category: re.compile('|'.join(map(re.escape, keywords)))
+            for category, keywords in self.category_keywords.items()
+            if keywords
+        }
+
+    def _bind_category_searches(self) -> Tuple[Tuple[EmailCategory, Callable], ...]:
+        """Bind each category's search method in priority order, resolved once per keyword change"""
+        return tuple(
+            (category, self._category_res[category].search)
+            for category in CATEGORY_PRIORITY
+            if category in self._category_res
+        )
+
+    def _best_keyword_category(self, text: str) -> Optional[EmailCategory]:
+        """Find the highest-priority keyword category in text with a single automaton scan"""
+        found = 0
+        for _, (_, _, mask) in self._automaton.iter(text):
+            found |= mask
+            # Bit 0 is urgent, which nothing can outrank
+            if found & 1:
+                break
+        
+        if not found:
+            return None
+        # The lowest set bit is the highest-priority category seen
+        return CATEGORY_PRIORITY[(found & -found).bit_length() - 1]
+
     def categorize_email(self, subject: str, body: str, sender_email: str) -> EmailCategory:
         """Categorize email based on subject, body, and sender"""
+        # Thread replies and auto-mailers repeat the same emails; str hashes are cached on the object
+        key = (subject, sender_email, len(body), hash(body))
+        with self._cache_lock:
+            category = self._category_cache.get(key)
+        if category is not None:
+            return category
+        
+        category = self._categorize_uncached(subject, body, sender_email)
+        
+        with self._cache_lock:
+            self._category_cache.put(key, category)
+        return category
+    
+    def _categorize_uncached(self, subject: str, body: str, sender_email: str) -> EmailCategory:
+        """Categorize email by keyword scan, falling back to the sender"""
         try:
-            # Combine subject and body for analysis
-            text = f"{subject} {body}".lower()
-            
-            # Check for urgent keywords first
-            if self._has_keywords(text, self.category_keywords[EmailCategory.URGENT]):
+            # Nothing outranks urgent, so an urgent subject settles it without lowercasing the body
+            subject_text = subject.lower()
+            if self._automaton is not None:
+                urgent = self._best_keyword_category(subject_text) is EmailCategory.URGENT
+            else:
+                pattern = self._category_res.get(EmailCategory.URGENT)
+                urgent = pattern is not None and pattern.search(subject_text) is not None
+            if urgent:
                 return EmailCategory.URGENT
             
-            # Check for meeting-related keywords
-            if self._has_keywords(text, self.category_keywords[EmailCategory.MEETINGS]):
-                return EmailCategory.MEETINGS
-            
-            # Check for deadline-related keywords
-            if self._has_keywords(text, self.category_keywords[EmailCategory.DEADLINES]):
-                return EmailCategory.DEADLINES
-            
-            # Check for work-related keywords
-            if self._has_keywords(text, self.category_keywords[EmailCategory.WORK]):
-                return EmailCategory.WORK
-            
-            # Check for personal keywords
-            if self._has_keywords(text, self.category_keywords[EmailCategory.PERSONAL]):
-                return EmailCategory.PERSONAL
-            
-            # Check for promotional keywords
-            if self._has_keywords(text, self.category_keywords[EmailCategory.PROMOTIONS]):
-                return EmailCategory.PROMOTIONS
+            # Combine subject and body for analysis
+            text = f"{subject_text} {body.lower()}"
             
-            # Check for social keywords
-            if self._has_keywords(text, self.category_keywords[EmailCategory.SOCIAL]):
-                return EmailCategory.SOCIAL
+            if self._automaton is not None:
+                category = self._best_keyword_category(text)
+                if category is not None:
+                    return category
+                return self._sender_or_other(sender_email)
             
-            # Check sender domain for additional clues
-            sender_category = self._categorize_by_sender(sender_email)
-            if sender_category != EmailCategory.OTHER:
-                return sender_category
+            # Check categories in priority order, urgent first
+            for category, search in self._category_searches:
+                if search(text):
+                    return category
             
-            # Default to other if no clear category
-            return EmailCategory.OTHER
+            return self._sender_or_other(sender_email)
             
         except Exception as e:
             print(f"Error categorizing email: {e}")
             return EmailCategory.OTHER
     
-    def _has_keywords(self, text: str, keywords: List[str]) -> bool:
-        """Check if text contains any of the given keywords"""
-        for keyword in keywords:
-            if keyword in text:
-                return True
-        return False
-    
-    def _categorize_by_sender(self, sender_email: str) -> EmailCategory:
-        """Categorize email based on sender domain"""
+    def categorize_many(self, items: List[Tuple[str, str, str]]) -> List[EmailCategory]:
+        """Categorize many (subject, body, sender_email) emails with one automaton scan"""
+        if self._automaton is None:
+            return [self.categorize_email(subject, body, sender_email) for subject, body, sender_email in items]
+        
         try:
-            domain = sender_email.split('@')[-1].lower()
+            texts = [f"{subject} {body}".lower() for subject, body, _ in items]
+            # No keyword contains NUL, so matches never span two emails
+            joined = "\0".join(texts)
             
-            # Work domains
-            work_domains = [
-                'gmail.com', 'outlook.com', 'hotmail.com', 'yahoo.com',
-                'company.com', 'corp.com', 'business.com', 'enterprise.com'
-            ]
+            # Offset of the separator after each email but the last
+            sentinels = []
+            offset = -1
+            for text in texts[:-1]:
+                offset += len(text) + 1
+                sentinels.append(offset)
             
-            # Social media domains
-            social_domains = [
-                'facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com',
-                'snapchat.com', 'tiktok.com', 'pinterest.com'
-            ]
+            found = [0] * len(items)
+            for end, (_, _, mask) in self._automaton.iter(joined):
+                found[bisect_right(sentinels, end)] |= mask
             
-            # Promotional domains
-            promo_domains = [
-                'amazon.com', 'ebay.com', 'etsy.com', 'shopify.com',
-                'mailchimp.com', 'constantcontact.com', 'sendgrid.com',
-                'salesforce.com', 'hubspot.com', 'marketing.com'
+            return [
+                CATEGORY_PRIORITY[(mask & -mask).bit_length() - 1] if mask else self._sender_or_other(sender_email)
+                for mask, (_, _, sender_email) in zip(found, items)
             ]
             
-            if domain in work_domains:
-                return EmailCategory.WORK
-            elif domain in social_domains:
-                return EmailCategory.SOCIAL
-            elif domain in promo_domains:
-                return EmailCategory.PROMOTIONS
-            
-            return EmailCategory.OTHER
+        except Exception as e:
+            print(f"Error categorizing emails in batch: {e}")
+            return [self.categorize_email(subject, body, sender_email) for subject, body, sender_email in items]
+    
+    def _sender_or_other(self, sender_email: str) -> EmailCategory:
+        """Fall back to the sender domain, or OTHER when it gives no clue"""
+        # Check sender domain for additional clues
+        sender_category = self._categorize_by_sender(sender_email)
+        if sender_category != EmailCategory.OTHER:
+            return sender_category
+        
+        # Default to other if no clear category
+        return EmailCategory.OTHER
+    
+    def _categorize_by_sender(self, sender_email: str) -> EmailCategory:
+        """Categorize email based on sender domain"""
+        try:
+            return _domain_category(sender_email.rsplit('@', 1)[-1].lower())
             
         except Exception as e:
             print(f"Error categorizing by sender: {e}")
@@ -152,14 +360,21 @@ class EmailCategorizer:
             text = f"{subject} {body}".lower()
             confidence_scores = {}
             
-            for category, keywords in self.category_keywords.items():
-                score = 0.0
-                for keyword in keywords:
-                    if keyword in text:
-                        score += 0.1  # Each keyword match adds 10% confidence
-                
-                # Normalize score
-                confidence_scores[category] = min(score, 1.0)
+            if self._automaton is not None:
+                # One scan finds every matched keyword; each counts once per listing in a category
+                matched = {keyword: categories for _, (keyword, categories, _) in self._automaton.iter(text)}
+                hits = Counter()
+                for categories in matched.values():
+                    hits.update(categories)
+            else:
+                hits = Counter({
+                    category: sum(1 for keyword in keywords if keyword in text)
+                    for category, keywords in self.category_keywords.items()
+                })
+            
+            for category in self.category_keywords:
+                # Each keyword match adds 10% confidence, normalized to at most 1.0
+                confidence_scores[category] = min(hits[category] * 0.1, 1.0)
             
             # Add sender-based confidence
             sender_category = self._categorize_by_sender(sender_email)
@@ -179,14 +394,14 @@ class EmailCategorizer:
             features = {
                 'has_question_marks': '?' in text,
                 'has_exclamation_marks': '!' in text,
-                'has_numbers': bool(re.search(r'\d', text)),
-                'has_dates': bool(re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', text)),
-                'has_times': bool(re.search(r'\d{1,2}:\d{2}', text)),
-                'has_urls': bool(re.search(r'http[s]?://', text)),
-                'has_emails': bool(re.search(r'\S+@\S+', text)),
+                'has_numbers': _DIGIT_RE.search(text) is not None,
+                'has_dates': _DATE_RE.search(text) is not None,
+                'has_times': _TIME_RE.search(text) is not None,
+                'has_urls': _URL_RE.search(text) is not None,
+                'has_emails': _EMAIL_RE.search(text) is not None,
                 'word_count': len(text.split()),
                 'sentence_count': len(text.split('.')),
-                'has_attachments': 'attachment' in text or 'attached' in text,
+                'has_attachments': 'attach' in text,
                 'has_signature': 'best regards' in text or 'sincerely' in text or 'thanks' in text
             }
             
@@ -199,7 +414,14 @@ class EmailCategorizer:
     def update_keywords(self, category: EmailCategory, keywords: List[str]):
         """Update keywords for a category"""
         if category in self.category_keywords:
-            self.category_keywords[category].extend(keywords)
+            self.category_keywords[category] = self._normalize_keywords(
+                self.category_keywords[category] + list(keywords)
+            )
+            self._automaton = self._build_automaton()
+            self._category_res = self._build_category_res()
+            self._category_searches = self._bind_category_searches()
+            with self._cache_lock:
+                self._category_cache.clear()
     
     def get_category_stats(self, emails: List[Dict[str, Any]]) -> Dict[EmailCategory, int]:
         """Get statistics for email categories"""
@@ -1,47 +1,74 @@
 import imaplib
 import email
-import re
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.utils import parseaddr
 import smtplib
 import os
+import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
 
 from app.models import EmailCategory, PriorityLevel, EmailSummary
 from app.core.database import db
-from app.core.ai_analyzer import AIAnalyzer
+from app.core.ai_analyzer import ai_analyzer
 from app.core.email_categorizer import EmailCategorizer
 
 load_dotenv()
 
+# Seconds a loaded VIP set is trusted before it is re-read from the database
+VIP_CACHE_TTL = 30
+
+# Emails analyzed concurrently; each analysis mostly waits on the AI API
+ANALYSIS_WORKERS = 8
+
+# Messages requested per FETCH, bounding the size of each server response
+FETCH_BATCH = 50
+
+# Urgency score thresholds and the priority at or above each one
+_PRIORITY_THRESHOLDS = (0.4, 0.6, 0.8)
+_PRIORITY_LEVELS = (PriorityLevel.LOW, PriorityLevel.MEDIUM, PriorityLevel.HIGH, PriorityLevel.URGENT)
+_URGENT_PRIORITIES = frozenset({'high', 'urgent'})
+
+@lru_cache(maxsize=None)
+def _default_email_config() -> Dict[str, Any]:
+    """Default email configuration read from the environment once"""
+    return {
+        "email_address": os.getenv("EMAIL_ADDRESS", ""),
+        "password": os.getenv("EMAIL_PASSWORD", ""),
+        "imap_server": os.getenv("IMAP_SERVER", "imap.gmail.com"),
+        "imap_port": int(os.getenv("IMAP_PORT", "993")),
+        "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+        "smtp_port": int(os.getenv("SMTP_PORT", "587")),
+        "use_ssl": True,
+        "vip_contacts": [],
+        "auto_categorize": True,
+        "daily_summary_time": "09:00",
+        "response_reminder_hours": 24,
+        "follow_up_reminder_days": 3
+    }
+
 class EmailProcessor:
     def __init__(self):
-        self.ai_analyzer = AIAnalyzer()
+        self.ai_analyzer = ai_analyzer
         self.categorizer = EmailCategorizer()
         self.config = self._load_config()
+        # (loaded_at, db.vip_generation, lowercased VIP emails)
+        self._vip_cache: Tuple[float, int, frozenset] = (0.0, -1, frozenset())
         
     def _load_config(self) -> Dict[str, Any]:
         """Load email configuration from database"""
         config = db.get_configuration("email_config")
         if not config:
-            # Default configuration
-            config = {
-                "email_address": os.getenv("EMAIL_ADDRESS", ""),
-                "password": os.getenv("EMAIL_PASSWORD", ""),
-                "imap_server": os.getenv("IMAP_SERVER", "imap.gmail.com"),
-                "imap_port": int(os.getenv("IMAP_PORT", "993")),
-                "smtp_server": os.getenv("SMTP_SERVER", "smtp.gmail.com"),
-                "smtp_port": int(os.getenv("SMTP_PORT", "587")),
-                "use_ssl": True,
-                "vip_contacts": [],
-                "auto_categorize": True,
-                "daily_summary_time": "09:00",
-                "response_reminder_hours": 24,
-                "follow_up_reminder_days": 3
-            }
+            # Default configuration; copied so callers can't mutate the cached one
+            config = _default_email_config().copy()
+            config["vip_contacts"] = []
         return config
 
     def connect_imap(self):
@@ -76,19 +103,29 @@ class EmailProcessor:
             # Get the latest emails
             email_list = message_numbers[0].split()[-limit:] if limit else message_numbers[0].split()
             
-            for num in email_list:
-                try:
-                    _, msg_data = imap.fetch(num, '(RFC822)')
-                    email_body = msg_data[0][1]
-                    email_message = email.message_from_bytes(email_body)
+            if not email_list:
+                return emails
+            
+            # One round-trip per batch of messages; PEEK leaves the \Seen flag untouched
+            for start in range(0, len(email_list), FETCH_BATCH):
+                _, msg_data = imap.fetch(b','.join(email_list[start:start + FETCH_BATCH]), '(BODY.PEEK[])')
+                
+                # The response alternates (envelope, body) tuples with b')' terminators
+                for item in msg_data:
+                    if not isinstance(item, tuple):
+                        continue
                     
-                    email_data = self._parse_email(email_message)
-                    if email_data:
-                        emails.append(email_data)
+                    num = item[0].split()[0]
+                    try:
+                        email_message = email.message_from_bytes(item[1])
                         
-                except Exception as e:
-                    print(f"Error parsing email {num}: {str(e)}")
-                    continue
+                        email_data = self._parse_email(email_message)
+                        if email_data:
+                            emails.append(email_data)
+                            
+                    except Exception as e:
+                        print(f"Error parsing email {num}: {str(e)}")
+                        continue
                     
         finally:
             imap.logout()
@@ -104,9 +141,10 @@ class EmailProcessor:
             date_str = email_message.get('Date', '')
             message_id = email_message.get('Message-ID', str(uuid.uuid4()))
             
-            # Parse sender email
-            sender_email = self._extract_email(sender)
-            sender_name = self._extract_name(sender)
+            # Parse sender name and address
+            sender_name, sender_email = parseaddr(sender)
+            sender_name = sender_name or "Unknown"
+            sender_email = sender_email.lower() if sender_email else sender
             
             # Parse date
             try:
@@ -131,72 +169,53 @@ class EmailProcessor:
             print(f"Error parsing email: {str(e)}")
             return None
 
-    def _extract_email(self, sender: str) -> str:
-        """Extract email address from sender string"""
-        email_pattern = r'<(.+?)>'
-        match = re.search(email_pattern, sender)
-        if match:
-            return match.group(1)
-        return sender
-
-    def _extract_name(self, sender: str) -> str:
-        """Extract name from sender string"""
-        name_pattern = r'^([^<]+)'
-        match = re.search(name_pattern, sender)
-        if match:
-            return match.group(1).strip()
-        return "Unknown"
-
     def _extract_body(self, email_message) -> str:
         """Extract email body content"""
         body = ""
         
         if email_message.is_multipart():
             for part in email_message.walk():
-                if part.get_content_type() == "text/plain":
-                    body = part.get_payload(decode=True).decode()
+                if part.get_content_type() == "text/plain" and part.get_content_disposition() != "attachment":
+                    body = self._decode_payload(part)
                     break
         else:
-            body = email_message.get_payload(decode=True).decode()
+            body = self._decode_payload(email_message)
             
         return body
 
-    def analyze_email(self, email_data: Dict[str, Any]) -> EmailSummary:
-        """Analyze email and create summary"""
-        # Categorize email
-        category = self.categorizer.categorize_email(
-            email_data['subject'], 
-            email_data['body'], 
-            email_data['sender_email']
-        )
-        
-        # Analyze urgency and priority
-        urgency_score = self.ai_analyzer.analyze_urgency(
-            email_data['subject'], 
-            email_data['body']
-        )
-        
-        priority = self._determine_priority(urgency_score, email_data['sender_email'])
+    def _decode_payload(self, part) -> str:
+        """Decode a message part with its declared charset, replacing bad bytes"""
+        payload = part.get_payload(decode=True)
+        if payload is None:
+            return ""
         
-        # Generate summary
-        summary = self.ai_analyzer.generate_summary(
-            email_data['subject'], 
-            email_data['body']
-        )
-        
-        # Check if action is required
-        action_required = self.ai_analyzer.check_action_required(
-            email_data['subject'], 
-            email_data['body']
-        )
+        charset = part.get_content_charset() or 'utf-8'
+        try:
+            return payload.decode(charset, errors='replace')
+        except LookupError:
+            # Unknown charset name in the header
+            return payload.decode('utf-8', errors='replace')
+
+    def analyze_email(self, email_data: Dict[str, Any], category: Optional[EmailCategory] = None) -> EmailSummary:
+        """Analyze email and create summary"""
+        # Categorize email unless the caller already did
+        if category is None:
+            category = self.categorizer.categorize_email(
+                email_data['subject'], 
+                email_data['body'], 
+                email_data['sender_email']
+            )
         
-        # Generate follow-up suggestions
-        follow_up_suggestions = self.ai_analyzer.generate_follow_up_suggestions(
+        # Analyze urgency, summary, action and follow-ups in one AI round-trip
+        analysis = self.ai_analyzer.analyze_email_bundle(
             email_data['subject'], 
             email_data['body'],
             category
         )
         
+        urgency_score = analysis['urgency']
+        priority = self._determine_priority(urgency_score, email_data['sender_email'])
+        
         return EmailSummary(
             id=email_data['id'],
             subject=email_data['subject'],
@@ -205,56 +224,77 @@ class EmailProcessor:
             received_at=email_data['received_at'],
             category=category,
             priority=priority,
-            summary=summary,
+            summary=analysis['summary'],
             urgency_score=urgency_score,
-            action_required=action_required,
-            follow_up_suggestions=follow_up_suggestions
+            action_required=analysis['action_required'],
+            follow_up_suggestions=analysis['suggestions']
         )
 
+    def _analyze_email_safe(self, email_data: Dict[str, Any], category: Optional[EmailCategory] = None) -> Optional[EmailSummary]:
+        """Analyze an email, returning None instead of raising"""
+        try:
+            return self.analyze_email(email_data, category)
+        except Exception as e:
+            print(f"Error analyzing email {email_data.get('id', 'unknown')}: {str(e)}")
+            return None
+
     def _determine_priority(self, urgency_score: float, sender_email: str) -> PriorityLevel:
         """Determine email priority based on urgency score and sender"""
         # Check if sender is VIP
-        vip_contacts = db.get_vip_contacts()
-        is_vip = any(contact['email'] == sender_email for contact in vip_contacts)
+        is_vip = sender_email.lower() in self._vips()
         
         if is_vip:
             return PriorityLevel.HIGH
         
-        if urgency_score >= 0.8:
-            return PriorityLevel.URGENT
-        elif urgency_score >= 0.6:
-            return PriorityLevel.HIGH
-        elif urgency_score >= 0.4:
-            return PriorityLevel.MEDIUM
-        else:
-            return PriorityLevel.LOW
+        return _PRIORITY_LEVELS[bisect_right(_PRIORITY_THRESHOLDS, urgency_score)]
 
-    def process_inbox(self, date: str = None):
-        """Process inbox and analyze emails"""
+    def _vips(self) -> frozenset:
+        """Get the VIP email set, re-reading it when it expires or a VIP is added"""
+        loaded_at, generation, vips = self._vip_cache
+        now = time.monotonic()
+        if now - loaded_at > VIP_CACHE_TTL or generation != db.vip_generation:
+            generation = db.vip_generation
+            vips = frozenset(contact['email'].lower() for contact in db.get_vip_contacts())
+            self._vip_cache = (now, generation, vips)
+        return vips
+
+    def process_inbox(self, date: str = None, new_only: bool = False):
+        """Process inbox and analyze emails not seen before; new_only returns just those"""
         try:
             # Fetch emails
             emails = self.fetch_emails(date)
             
-            # Analyze each email
-            email_summaries = []
-            for email_data in emails:
-                try:
-                    summary = self.analyze_email(email_data)
-                    email_summaries.append(summary.dict())
-                    
-                    # Save to database
-                    db.save_email_summary(summary.dict())
-                    
-                except Exception as e:
-                    print(f"Error analyzing email {email_data.get('id', 'unknown')}: {str(e)}")
-                    continue
+            # Emails analyzed on an earlier run keep their stored summary, read/replied flags included
+            known = db.get_emails_by_ids([email_data['id'] for email_data in emails])
+            new_emails = [email_data for email_data in emails if email_data['id'] not in known]
+            
+            # Categorize the whole batch in one keyword scan
+            categories = self.categorizer.categorize_many([
+                (email_data['subject'], email_data['body'], email_data['sender_email'])
+                for email_data in new_emails
+            ])
+            
+            # Analyze the emails concurrently, keeping inbox order
+            with ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS) as executor:
+                summaries = list(executor.map(self._analyze_email_safe, new_emails, categories))
+            
+            new_summaries = {summary.id: summary.model_dump() for summary in summaries if summary is not None}
+            
+            # Save to database in one transaction
+            db.save_email_summaries(list(new_summaries.values()))
+            
+            email_summaries = [
+                known.get(email_data['id']) or new_summaries.get(email_data['id'])
+                for email_data in emails
+            ]
+            email_summaries = [summary for summary in email_summaries if summary]
             
             # Generate daily summary
             if email_summaries:
                 daily_summary = self._generate_daily_summary(email_summaries, date)
                 db.save_daily_summary(daily_summary)
             
-            return email_summaries
+            return list(new_summaries.values()) if new_only else email_summaries
             
         except Exception as e:
             raise Exception(f"Error processing inbox: {str(e)}")
@@ -265,23 +305,21 @@ class EmailProcessor:
             date = datetime.now().strftime('%Y-%m-%d')
         
         # Count categories
-        categories = {}
-        priority_breakdown = {}
+        categories = Counter()
+        priority_breakdown = Counter()
         urgent_emails = []
         unread_emails = []
         response_reminders = []
         
         for summary in email_summaries:
-            # Category count
-            category = summary['category']
-            categories[category] = categories.get(category, 0) + 1
-            
-            # Priority count
             priority = summary['priority']
-            priority_breakdown[priority] = priority_breakdown.get(priority, 0) + 1
+            
+            # Category and priority counts
+            categories[summary['category']] += 1
+            priority_breakdown[priority] += 1
             
             # Urgent emails
-            if summary['priority'] in ['high', 'urgent'] or summary['urgency_score'] >= 0.7:
+            if priority in _URGENT_PRIORITIES or summary['urgency_score'] >= 0.7:
                 urgent_emails.append(summary)
             
             # Unread emails
@@ -295,11 +333,11 @@ class EmailProcessor:
         return {
             'date': date,
             'total_emails': len(email_summaries),
-            'categories': categories,
+            'categories': dict(categories),
             'urgent_emails': urgent_emails,
             'unread_emails': unread_emails,
             'response_reminders': response_reminders,
-            'priority_breakdown': priority_breakdown
+            'priority_breakdown': dict(priority_breakdown)
         }
 
     def get_response_reminders(self, hours_threshold: int = 24) -> List[Dict[str, Any]]:
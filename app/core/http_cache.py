@@ -0,0 +1,42 @@
+import hashlib
+import json
+from typing import Any, Optional, Tuple
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Seconds a client may reuse a polled response before asking again
+MAX_AGE = 30
+
+def encode_with_etag(payload: Any) -> Tuple[bytes, str]:
+    """Serialize payload to JSON and derive its ETag from the bytes"""
+    if isinstance(payload, BaseModel):
+        body = payload.model_dump_json().encode()
+    elif orjson:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload).encode()
+    return body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against etag, ignoring weak prefixes"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def conditional_response(request: Request, encoded: Tuple[bytes, str], max_age: int = MAX_AGE,
+                         public: bool = False) -> Response:
+    """Send the encoded JSON, or an empty 304 when the client already has this version"""
+    body, etag = encoded
+    # Only responses that are the same for every user may be stored by shared caches
+    scope = "public" if public else "private"
+    headers = {"ETag": etag, "Cache-Control": f"{scope}, max-age={max_age}"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
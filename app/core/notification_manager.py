@@ -1,20 +1,171 @@
 import requests
 import json
-from typing import List, Dict, Any, Optional
+import html
+import re
+import logging
+import queue
+import threading
+import time
+import asyncio
+import weakref
+import httpx
+from typing import List, Dict, Any, Optional, Tuple
 import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from app.core.database import db
 
+try:
+    import h2  # noqa: F401 - lets httpx negotiate HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Webhook payloads go out as compact UTF-8; requests' json= would escape every emoji to \uXXXX pairs
+if orjson:
+    _encode = orjson.dumps
+else:
+    def _encode(payload: Dict[str, Any]) -> bytes:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+
 load_dotenv()
 
+# Keep-alive session shared by every manager so webhook hosts reuse their TLS connections.
+# Only failed connections and statuses that mean the post was not processed are retried; a read
+# timeout may come after the webhook took the message, so retrying it would duplicate it.
+_retry = Retry(
+    total=3,
+    connect=3,
+    read=0,
+    backoff_factor=0.3,
+    status_forcelist=[429, 503],
+    allowed_methods=frozenset({"POST"}),
+    raise_on_status=False
+)
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_retry)
+_session = requests.Session()
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+_session.headers.update({"Content-Type": "application/json"})
+
+# Channels are posted to in parallel; seconds to wait for each before reporting it failed
+_notify_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="notify")
+NOTIFY_TIMEOUT = 15
+
+# Background sends wait here for the dispatcher thread; failed channels are retried with doubling delays
+OUTBOX_SIZE = 256
+OUTBOX_RETRIES = 3
+OUTBOX_BACKOFF = 1.0
+_outbox: "queue.Queue[Tuple[Any, str, str, str]]" = queue.Queue(maxsize=OUTBOX_SIZE)
+_dispatcher: Optional[threading.Thread] = None
+_dispatcher_lock = threading.Lock()
+
+# Manager shared by the API routes, built on first use
+_shared_manager: Optional["NotificationManager"] = None
+_shared_lock = threading.Lock()
+
+# Async counterpart per event loop, since a client's pool belongs to the loop that opened it;
+# with HTTP/2 each webhook host is one multiplexed connection
+_ahttp_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+# Total seconds an async post may take, so one slow provider can't hold up the request
+ASYNC_NOTIFY_TIMEOUT = 5.0
+
+# Slack attachment color for each priority
+PRIORITY_COLORS = {
+    "urgent": "#ff0000",  # Red
+    "high": "#ff9900",    # Orange
+    "normal": "#36a64f",  # Green
+    "low": "#cccccc"      # Gray
+}
+
+# Telegram message emoji for each priority
+PRIORITY_EMOJI = {
+    "urgent": "🚨",
+    "high": "⚠️",
+    "normal": "📧",
+    "low": "📬"
+}
+
+# Single-asterisk bold shared with Slack and WhatsApp, rewritten as a Telegram HTML tag
+_TELEGRAM_BOLD = re.compile(r"\*([^*\n]+)\*")
+
+# Display name of each channel in log messages
+CHANNEL_NAMES = {"slack": "Slack", "telegram": "Telegram", "whatsapp": "WhatsApp"}
+
+# (database, its config_generation, stored notification config) from the last database read
+_config_cache: Tuple[Any, int, Optional[Dict[str, Any]]] = (None, -1, None)
+
+TEST_MESSAGE = "🧪 This is a test notification from your Intelligent Email Agent. If you receive this, your notifications are working correctly!"
+
+def _run_outbox():
+    """Deliver queued notifications one at a time for the life of the process"""
+    while True:
+        manager, title, message, priority = _outbox.get()
+        try:
+            manager._dispatch(title, message, priority)
+        except Exception as e:
+            logger.error("Error delivering queued notification: %s", e)
+        finally:
+            _outbox.task_done()
+
+def _ahttp() -> httpx.AsyncClient:
+    """Get the running event loop's async client, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    client = _ahttp_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            headers={"Content-Type": "application/json"},
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32)
+        )
+        _ahttp_clients[loop] = client
+    return client
+
+async def close_async_client():
+    """Close the running event loop's async client, if one was opened"""
+    client = _ahttp_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def get_notification_manager() -> "NotificationManager":
+    """Get the shared notification manager, reloading its config after any saved change"""
+    global _shared_manager
+    with _shared_lock:
+        if _shared_manager is None:
+            _shared_manager = NotificationManager()
+        else:
+            _shared_manager.refresh_config()
+        return _shared_manager
+
 class NotificationManager:
     def __init__(self):
         self.config = self._load_config()
         
     def _load_config(self) -> Dict[str, Any]:
         """Load notification configuration from database"""
-        config = db.get_configuration("notification_config")
-        if not config:
+        global _config_cache
+        cached_db, generation, config = _config_cache
+        if cached_db is not db or generation != db.config_generation:
+            # Read the generation first so a write during the query forces another reload
+            generation = db.config_generation
+            config = db.get_configuration("notification_config")
+            _config_cache = (db, generation, config)
+        self._loaded_from = (db, generation)
+        
+        if config:
+            # Each manager updates its own copy
+            config = dict(config)
+        else:
             # Default configuration
             config = {
                 "slack_webhook_url": os.getenv("SLACK_WEBHOOK_URL", ""),
@@ -26,150 +177,221 @@ class NotificationManager:
             }
         return config
     
-    def send_notification(self, title: str, message: str, priority: str = "normal") -> Dict[str, bool]:
-        """Send notification to all configured channels"""
+    def refresh_config(self):
+        """Reload the configuration if it was saved since this manager read it"""
+        loaded_db, generation = self._loaded_from
+        if loaded_db is not db or generation != db.config_generation:
+            self.config = self._load_config()
+    
+    def send_notification(self, title: str, message: str, priority: str = "normal", channels: Optional[List[str]] = None,
+                          wait: bool = False) -> Dict[str, bool]:
+        """Send notification to all configured channels, or only the given ones.
+        
+        A channel still posting after NOTIFY_TIMEOUT is reported failed unless wait is set.
+        """
         results = {}
+        futures = {}
+        wanted = channels or CHANNEL_NAMES
         
         try:
             # Send to Slack
-            if self.config.get("slack_webhook_url"):
-                results["slack"] = self._send_slack_notification(title, message, priority)
+            if "slack" in wanted and self.config.get("slack_webhook_url"):
+                futures["slack"] = _notify_pool.submit(self._send_slack_notification, title, message, priority)
             
             # Send to Telegram
-            if self.config.get("telegram_bot_token") and self.config.get("telegram_chat_id"):
-                results["telegram"] = self._send_telegram_notification(title, message, priority)
+            if "telegram" in wanted and self.config.get("telegram_bot_token") and self.config.get("telegram_chat_id"):
+                futures["telegram"] = _notify_pool.submit(self._send_telegram_notification, title, message, priority)
             
             # Send to WhatsApp
-            if self.config.get("whatsapp_webhook_url"):
-                results["whatsapp"] = self._send_whatsapp_notification(title, message, priority)
+            if "whatsapp" in wanted and self.config.get("whatsapp_webhook_url"):
+                futures["whatsapp"] = _notify_pool.submit(self._send_whatsapp_notification, title, message, priority)
+            
+            # Wall time is the slowest channel rather than the sum of all of them
+            for channel, future in futures.items():
+                try:
+                    results[channel] = future.result(timeout=None if wait else NOTIFY_TIMEOUT)
+                except FutureTimeoutError:
+                    logger.warning("Timed out sending %s notification", channel)
+                    results[channel] = False
             
             return results
             
         except Exception as e:
-            print(f"Error sending notifications: {e}")
+            logger.error("Error sending notifications: %s", e)
             return {"error": str(e)}
     
-    def _send_slack_notification(self, title: str, message: str, priority: str = "normal") -> bool:
-        """Send notification to Slack"""
+    def send_notification_background(self, title: str, message: str, priority: str = "normal") -> bool:
+        """Queue a notification for the dispatcher thread and return without waiting on the network"""
+        global _dispatcher
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = threading.Thread(target=_run_outbox, name="notify-outbox", daemon=True)
+                _dispatcher.start()
+        
         try:
-            webhook_url = self.config.get("slack_webhook_url")
-            if not webhook_url:
-                return False
-            
-            # Determine color based on priority
-            color_map = {
-                "urgent": "#ff0000",  # Red
-                "high": "#ff9900",    # Orange
-                "normal": "#36a64f",  # Green
-                "low": "#cccccc"      # Gray
-            }
-            color = color_map.get(priority, color_map["normal"])
-            
-            # Prepare Slack message
-            slack_message = {
-                "attachments": [
-                    {
-                        "color": color,
-                        "title": title,
-                        "text": message,
-                        "footer": "Intelligent Email Agent",
-                        "ts": int(time.time())
-                    }
-                ]
+            _outbox.put_nowait((self, title, message, priority))
+            return True
+        except queue.Full:
+            logger.warning("Notification queue full, dropping: %s", title)
+            return False
+    
+    def _dispatch(self, title: str, message: str, priority: str = "normal"):
+        """Deliver a queued notification, retrying only the channels that failed"""
+        channels = None
+        for attempt in range(OUTBOX_RETRIES):
+            # Wait out slow posts: one that times out here may still deliver, and must not be sent again
+            results = self.send_notification(title, message, priority, channels, wait=True)
+            channels = [channel for channel in CHANNEL_NAMES if results.get(channel) is False]
+            if not channels:
+                return
+            if attempt < OUTBOX_RETRIES - 1:
+                time.sleep(OUTBOX_BACKOFF * 2 ** attempt)
+        
+        logger.error("Giving up on %s notification to %s", title, ", ".join(channels))
+    
+    async def send_notification_async(self, title: str, message: str, priority: str = "normal") -> Dict[str, bool]:
+        """Send notification to all configured channels without blocking the event loop"""
+        try:
+            requests_by_channel = {
+                "slack": self._slack_request(title, message, priority),
+                "telegram": self._telegram_request(title, message, priority),
+                "whatsapp": self._whatsapp_request(title, message, priority)
             }
+            channels = [channel for channel, request in requests_by_channel.items() if request]
             
-            # Send to Slack
-            response = requests.post(
-                webhook_url,
-                json=slack_message,
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
+            sent = await asyncio.gather(*(
+                self._apost(channel, requests_by_channel[channel], title) for channel in channels
+            ))
+            return dict(zip(channels, sent))
             
-            if response.status_code == 200:
-                print(f"Slack notification sent successfully: {title}")
-                return True
-            else:
-                print(f"Failed to send Slack notification: {response.status_code}")
+        except Exception as e:
+            logger.error("Error sending notifications: %s", e)
+            return {"error": str(e)}
+    
+    async def _apost(self, channel: str, request: Tuple[str, Dict[str, Any]], title: str) -> bool:
+        """Post one channel's payload on the shared async client"""
+        try:
+            url, payload = request
+            response = await asyncio.wait_for(_ahttp().post(url, content=_encode(payload)), ASYNC_NOTIFY_TIMEOUT)
+            return self._check_response(CHANNEL_NAMES[channel], title, response.status_code)
+        except asyncio.TimeoutError:
+            logger.warning("Timed out sending %s notification", CHANNEL_NAMES[channel])
+            return False
+        except Exception as e:
+            logger.error("Error sending %s notification: %s", CHANNEL_NAMES[channel], e)
+            return False
+    
+    @staticmethod
+    def _check_response(name: str, title: str, status_code: int) -> bool:
+        """Report whether a channel accepted the notification"""
+        if status_code == 200:
+            logger.info("%s notification sent successfully: %s", name, title)
+            return True
+        
+        logger.error("Failed to send %s notification: %s", name, status_code)
+        return False
+    
+    def _slack_request(self, title: str, message: str, priority: str = "normal") -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Build the Slack webhook post, or None when Slack is not configured"""
+        webhook_url = self.config.get("slack_webhook_url")
+        if not webhook_url:
+            return None
+        
+        # Determine color based on priority
+        color = PRIORITY_COLORS.get(priority, PRIORITY_COLORS["normal"])
+        
+        # Prepare Slack message
+        slack_message = {
+            "attachments": [
+                {
+                    "color": color,
+                    "title": title,
+                    "text": message,
+                    "footer": "Intelligent Email Agent",
+                    "ts": int(time.time())
+                }
+            ]
+        }
+        return webhook_url, slack_message
+    
+    def _telegram_request(self, title: str, message: str, priority: str = "normal") -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Build the Telegram sendMessage post, or None when Telegram is not configured"""
+        bot_token = self.config.get("telegram_bot_token")
+        chat_id = self.config.get("telegram_chat_id")
+        
+        if not bot_token or not chat_id:
+            return None
+        
+        # Prepare message with emoji based on priority
+        emoji = PRIORITY_EMOJI.get(priority, PRIORITY_EMOJI["normal"])
+        
+        # HTML mode only needs <, > and & escaped, so subjects with _ or * no longer break parsing
+        body = _TELEGRAM_BOLD.sub(r"<b>\1</b>", html.escape(message, quote=False))
+        telegram_message = f"{emoji} <b>{html.escape(title, quote=False)}</b>\n\n{body}"
+        
+        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
+        payload = {
+            "chat_id": chat_id,
+            "text": telegram_message,
+            "parse_mode": "HTML"
+        }
+        return url, payload
+    
+    def _whatsapp_request(self, title: str, message: str, priority: str = "normal") -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Build the WhatsApp webhook post, or None when WhatsApp is not configured"""
+        webhook_url = self.config.get("whatsapp_webhook_url")
+        if not webhook_url:
+            return None
+        
+        # Prepare WhatsApp message
+        whatsapp_message = {
+            "title": title,
+            "message": message,
+            "priority": priority,
+            "timestamp": int(time.time())
+        }
+        return webhook_url, whatsapp_message
+    
+    def _send_slack_notification(self, title: str, message: str, priority: str = "normal") -> bool:
+        """Send notification to Slack"""
+        try:
+            request = self._slack_request(title, message, priority)
+            if not request:
                 return False
+            
+            response = _session.post(request[0], data=_encode(request[1]), timeout=10)
+            return self._check_response("Slack", title, response.status_code)
                 
         except Exception as e:
-            print(f"Error sending Slack notification: {e}")
+            logger.error("Error sending Slack notification: %s", e)
             return False
     
     def _send_telegram_notification(self, title: str, message: str, priority: str = "normal") -> bool:
         """Send notification to Telegram"""
         try:
-            bot_token = self.config.get("telegram_bot_token")
-            chat_id = self.config.get("telegram_chat_id")
-            
-            if not bot_token or not chat_id:
+            request = self._telegram_request(title, message, priority)
+            if not request:
                 return False
             
-            # Prepare message with emoji based on priority
-            emoji_map = {
-                "urgent": "🚨",
-                "high": "⚠️",
-                "normal": "📧",
-                "low": "📬"
-            }
-            emoji = emoji_map.get(priority, emoji_map["normal"])
-            
-            telegram_message = f"{emoji} *{title}*\n\n{message}"
-            
-            # Send to Telegram
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-            payload = {
-                "chat_id": chat_id,
-                "text": telegram_message,
-                "parse_mode": "Markdown"
-            }
-            
-            response = requests.post(url, json=payload, timeout=10)
-            
-            if response.status_code == 200:
-                print(f"Telegram notification sent successfully: {title}")
-                return True
-            else:
-                print(f"Failed to send Telegram notification: {response.status_code}")
-                return False
+            response = _session.post(request[0], data=_encode(request[1]), timeout=10)
+            return self._check_response("Telegram", title, response.status_code)
                 
         except Exception as e:
-            print(f"Error sending Telegram notification: {e}")
+            logger.error("Error sending Telegram notification: %s", e)
             return False
     
     def _send_whatsapp_notification(self, title: str, message: str, priority: str = "normal") -> bool:
         """Send notification to WhatsApp"""
         try:
-            webhook_url = self.config.get("whatsapp_webhook_url")
-            if not webhook_url:
+            request = self._whatsapp_request(title, message, priority)
+            if not request:
                 return False
             
-            # Prepare WhatsApp message
-            whatsapp_message = {
-                "title": title,
-                "message": message,
-                "priority": priority,
-                "timestamp": int(time.time())
-            }
-            
-            # Send to WhatsApp webhook
-            response = requests.post(
-                webhook_url,
-                json=whatsapp_message,
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                print(f"WhatsApp notification sent successfully: {title}")
-                return True
-            else:
-                print(f"Failed to send WhatsApp notification: {response.status_code}")
-                return False
+            response = _session.post(request[0], data=_encode(request[1]), timeout=10)
+            return self._check_response("WhatsApp", title, response.status_code)
                 
         except Exception as e:
-            print(f"Error sending WhatsApp notification: {e}")
+            logger.error("Error sending WhatsApp notification: %s", e)
             return False
     
     def send_daily_summary(self, daily_summary: Dict[str, Any]) -> Dict[str, bool]:
@@ -177,36 +399,38 @@ class NotificationManager:
         try:
             title = f"📧 Daily Email Summary - {daily_summary.get('date', 'Today')}"
             
-            message = f"📊 *Total emails:* {daily_summary.get('total_emails', 0)}\n"
+            parts = [f"📊 *Total emails:* {daily_summary.get('total_emails', 0)}\n"]
             
             # Add category breakdown
             categories = daily_summary.get('categories', {})
             if categories:
-                message += "\n📂 *Categories:*\n"
-                for category, count in categories.items():
-                    message += f"   • {category}: {count}\n"
+                parts.append("\n📂 *Categories:*\n")
+                parts.extend(f"   • {category}: {count}\n" for category, count in categories.items())
             
             # Add urgent emails
             urgent_emails = daily_summary.get('urgent_emails', [])
             if urgent_emails:
-                message += f"\n⚠️ *Urgent emails:* {len(urgent_emails)}\n"
-                for email in urgent_emails[:3]:  # Show top 3
-                    message += f"   • {email.get('subject', 'No subject')} - {email.get('sender', 'Unknown')}\n"
+                parts.append(f"\n⚠️ *Urgent emails:* {len(urgent_emails)}\n")
+                # Show top 3
+                parts.extend(
+                    f"   • {email.get('subject', 'No subject')} - {email.get('sender', 'Unknown')}\n"
+                    for email in urgent_emails[:3]
+                )
             
             # Add unread emails
             unread_emails = daily_summary.get('unread_emails', [])
             if unread_emails:
-                message += f"\n📬 *Unread emails:* {len(unread_emails)}\n"
+                parts.append(f"\n📬 *Unread emails:* {len(unread_emails)}\n")
             
             # Add response reminders
             response_reminders = daily_summary.get('response_reminders', [])
             if response_reminders:
-                message += f"\n🧾 *Response reminders:* {len(response_reminders)}\n"
+                parts.append(f"\n🧾 *Response reminders:* {len(response_reminders)}\n")
             
-            return self.send_notification(title, message, "normal")
+            return self.send_notification(title, "".join(parts), "normal")
             
         except Exception as e:
-            print(f"Error sending daily summary: {e}")
+            logger.error("Error sending daily summary: %s", e)
             return {"error": str(e)}
     
     def send_urgent_alert(self, urgent_emails: List[Dict[str, Any]]) -> Dict[str, bool]:
@@ -214,21 +438,23 @@ class NotificationManager:
         try:
             title = "🚨 Urgent Email Alert"
             
-            message = f"⚠️ You have {len(urgent_emails)} urgent emails:\n\n"
+            parts = [f"⚠️ You have {len(urgent_emails)} urgent emails:\n\n"]
             
             for email in urgent_emails[:5]:  # Limit to 5
-                message += f"📧 *{email.get('subject', 'No subject')}*\n"
-                message += f"   From: {email.get('sender', 'Unknown')}\n"
-                message += f"   Priority: {email.get('priority', 'Unknown')}\n"
-                message += f"   Summary: {email.get('summary', 'No summary')}\n\n"
+                parts.append(
+                    f"📧 *{email.get('subject', 'No subject')}*\n"
+                    f"   From: {email.get('sender', 'Unknown')}\n"
+                    f"   Priority: {email.get('priority', 'Unknown')}\n"
+                    f"   Summary: {email.get('summary', 'No summary')}\n\n"
+                )
             
             if len(urgent_emails) > 5:
-                message += f"... and {len(urgent_emails) - 5} more urgent emails"
+                parts.append(f"... and {len(urgent_emails) - 5} more urgent emails")
             
-            return self.send_notification(title, message, "urgent")
+            return self.send_notification(title, "".join(parts), "urgent")
             
         except Exception as e:
-            print(f"Error sending urgent alert: {e}")
+            logger.error("Error sending urgent alert: %s", e)
             return {"error": str(e)}
     
     def send_response_reminder(self, reminder_emails: List[Dict[str, Any]]) -> Dict[str, bool]:
@@ -236,40 +462,46 @@ class NotificationManager:
         try:
             title = "🧾 Response Reminders"
             
-            message = f"📧 You have {len(reminder_emails)} emails that need responses:\n\n"
+            parts = [f"📧 You have {len(reminder_emails)} emails that need responses:\n\n"]
             
             for email in reminder_emails[:5]:  # Limit to 5
-                message += f"📧 *{email.get('subject', 'No subject')}*\n"
-                message += f"   From: {email.get('sender', 'Unknown')}\n"
-                message += f"   Received: {email.get('received_at', 'Unknown')}\n"
-                message += f"   Action: {email.get('action_required', 'Response needed')}\n\n"
+                parts.append(
+                    f"📧 *{email.get('subject', 'No subject')}*\n"
+                    f"   From: {email.get('sender', 'Unknown')}\n"
+                    f"   Received: {email.get('received_at', 'Unknown')}\n"
+                    f"   Action: {email.get('action_required', 'Response needed')}\n\n"
+                )
             
             if len(reminder_emails) > 5:
-                message += f"... and {len(reminder_emails) - 5} more emails need responses"
+                parts.append(f"... and {len(reminder_emails) - 5} more emails need responses")
             
-            return self.send_notification(title, message, "high")
+            return self.send_notification(title, "".join(parts), "high")
             
         except Exception as e:
-            print(f"Error sending response reminder: {e}")
+            logger.error("Error sending response reminder: %s", e)
             return {"error": str(e)}
     
     def test_notifications(self) -> Dict[str, bool]:
         """Test all configured notification channels"""
-        test_message = "🧪 This is a test notification from your Intelligent Email Agent. If you receive this, your notifications are working correctly!"
-        
-        return self.send_notification("Test Notification", test_message, "normal")
+        return self.send_notification("Test Notification", TEST_MESSAGE, "normal")
+    
+    async def test_notifications_async(self) -> Dict[str, bool]:
+        """Test all configured notification channels without blocking the event loop"""
+        return await self.send_notification_async("Test Notification", TEST_MESSAGE, "normal")
     
     def update_config(self, new_config: Dict[str, Any]):
         """Update notification configuration"""
         try:
-            self.config.update(new_config)
+            updated = {**self.config, **new_config}
+            if updated == self.config:
+                return
+            
+            self.config = updated
             db.save_configuration("notification_config", self.config)
-            print("Notification configuration updated")
+            logger.info("Notification configuration updated")
         except Exception as e:
-            print(f"Error updating notification config: {e}")
+            logger.error("Error updating notification config: %s", e)
     
     def get_config(self) -> Dict[str, Any]:
         """Get current notification configuration"""
         return self.config.copy()
-
-import time  # Add this import at the top 
\ No newline at end of file
@@ -1,8 +1,10 @@
 import schedule
-import time
 import threading
+import logging
+from collections import Counter
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import cached_property
+from typing import List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 
@@ -12,12 +14,38 @@ from app.core.database import db
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+_URGENT_PRIORITIES = frozenset({'high', 'urgent'})
+
+# Longest the loop sleeps between checks, so wall-clock jumps are noticed
+MAX_IDLE_SECONDS = 3600
+
+# Alerts queued within this many seconds of each other go out as one notification
+NOTIFY_BATCH_SECONDS = 2
+
 class EmailScheduler:
     def __init__(self):
-        self.processor = EmailProcessor()
-        self.notification_manager = NotificationManager()
         self.running = False
         self.thread = None
+        # Set to wake the loop early, on stop or when a job is added
+        self._wake = threading.Event()
+        # (db.config_generation, stored email config) from the last database read
+        self._config_cache: Tuple[int, Optional[dict]] = (-1, None)
+        # (title, message) alerts waiting for the batch timer to send them
+        self._pending: List[Tuple[str, str]] = []
+        self._pending_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+    
+    @cached_property
+    def processor(self) -> EmailProcessor:
+        """Email processor, built on first use"""
+        return EmailProcessor()
+    
+    @cached_property
+    def notification_manager(self) -> NotificationManager:
+        """Notification manager, built on first use"""
+        return NotificationManager()
         
     def start(self):
         """Start the scheduler in a separate thread"""
@@ -25,19 +53,21 @@ class EmailScheduler:
             self.running = True
             self.thread = threading.Thread(target=self._run_scheduler, daemon=True)
             self.thread.start()
-            print("Email scheduler started")
+            logger.info("Email scheduler started")
     
     def stop(self):
         """Stop the scheduler"""
         self.running = False
+        self._wake.set()
         if self.thread:
             self.thread.join()
-        print("Email scheduler stopped")
+        self._flush()
+        logger.info("Email scheduler stopped")
     
     def _run_scheduler(self):
         """Run the scheduler loop"""
         # Schedule daily email processing
-        config = db.get_configuration("email_config")
+        config = self._email_config()
         daily_time = config.get("daily_summary_time", "09:00") if config else "09:00"
         
         schedule.every().day.at(daily_time).do(self._process_daily_emails)
@@ -48,16 +78,33 @@ class EmailScheduler:
         # Schedule response reminders (every 6 hours)
         schedule.every(6).hours.do(self._check_response_reminders)
         
-        print(f"Scheduled daily email processing at {daily_time}")
+        # Drop expired OpenAI responses so the cache table doesn't grow without bound
+        schedule.every().day.do(self._purge_response_cache)
+        
+        logger.info("Scheduled daily email processing at %s", daily_time)
         
         while self.running:
             schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            
+            # Sleep until the next job is due instead of polling every minute
+            idle = schedule.idle_seconds()
+            timeout = MAX_IDLE_SECONDS if idle is None else min(max(idle, 0), MAX_IDLE_SECONDS)
+            self._wake.wait(timeout)
+            self._wake.clear()
+    
+    def _email_config(self) -> Optional[dict]:
+        """Get the stored email config, re-reading it only after a configuration write"""
+        generation, config = self._config_cache
+        if generation != db.config_generation:
+            generation = db.config_generation
+            config = db.get_configuration("email_config")
+            self._config_cache = (generation, config)
+        return config
     
     def _process_daily_emails(self):
         """Process emails and generate daily summary"""
         try:
-            print(f"Processing daily emails at {datetime.now()}")
+            logger.info("Processing daily emails")
             
             # Process today's emails
             today = datetime.now().strftime('%Y-%m-%d')
@@ -73,25 +120,24 @@ class EmailScheduler:
                 # Send notifications
                 self._send_daily_notifications(daily_summary)
                 
-                print(f"Processed {len(email_summaries)} emails for {today}")
+                logger.info("Processed %s emails for %s", len(email_summaries), today)
             else:
-                print(f"No emails found for {today}")
+                logger.info("No emails found for %s", today)
                 
         except Exception as e:
-            print(f"Error processing daily emails: {e}")
+            logger.error("Error processing daily emails: %s", e)
     
     def _check_new_emails(self):
         """Check for new emails periodically"""
         try:
-            print(f"Checking for new emails at {datetime.now()}")
+            logger.info("Checking for new emails")
             
             # Process recent emails (last 2 hours)
             recent_time = (datetime.now() - timedelta(hours=2)).strftime('%Y-%m-%d %H:%M:%S')
             
-            # This would typically fetch emails since the last check
-            # For now, we'll just process today's emails
+            # Only emails not analyzed by an earlier run come back, so alerts aren't repeated
             today = datetime.now().strftime('%Y-%m-%d')
-            email_summaries = self.processor.process_inbox(today)
+            email_summaries = self.processor.process_inbox(today, new_only=True)
             
             # Check for urgent emails
             urgent_emails = [e for e in email_summaries if e.get('priority') in ['high', 'urgent']]
@@ -100,14 +146,14 @@ class EmailScheduler:
                 self._send_urgent_notifications(urgent_emails)
                 
         except Exception as e:
-            print(f"Error checking new emails: {e}")
+            logger.error("Error checking new emails: %s", e)
     
     def _check_response_reminders(self):
         """Check for emails that need responses"""
         try:
-            print(f"Checking response reminders at {datetime.now()}")
+            logger.info("Checking response reminders")
             
-            config = db.get_configuration("email_config")
+            config = self._email_config()
             reminder_hours = config.get("response_reminder_hours", 24) if config else 24
             
             # Get emails that haven't been replied to
@@ -119,7 +165,15 @@ class EmailScheduler:
                 self._send_reminder_notifications(reminder_emails)
                 
         except Exception as e:
-            print(f"Error checking response reminders: {e}")
+            logger.error("Error checking response reminders: %s", e)
+    
+    def _purge_response_cache(self):
+        """Delete expired entries from the OpenAI response cache"""
+        try:
+            removed = db.purge_expired_responses()
+            logger.info("Purged %s expired AI responses", removed)
+        except Exception as e:
+            logger.error("Error purging AI response cache: %s", e)
     
     def _generate_daily_summary(self, email_summaries: list) -> dict:
         """Generate daily summary from email summaries"""
@@ -131,27 +185,26 @@ class EmailScheduler:
                 'urgent_emails': [],
                 'unread_emails': [],
                 'response_reminders': [],
-                'priority_breakdown': {}
+                'priority_breakdown': {},
+                'ai_input': []
             }
         
         # Count categories
-        categories = {}
-        priority_breakdown = {}
+        categories = Counter()
+        priority_breakdown = Counter()
         urgent_emails = []
         unread_emails = []
         response_reminders = []
         
         for summary in email_summaries:
-            # Category count
-            category = summary.get('category', 'other')
-            categories[category] = categories.get(category, 0) + 1
-            
-            # Priority count
             priority = summary.get('priority', 'low')
-            priority_breakdown[priority] = priority_breakdown.get(priority, 0) + 1
+            
+            # Category and priority counts
+            categories[summary.get('category', 'other')] += 1
+            priority_breakdown[priority] += 1
             
             # Urgent emails
-            if summary.get('priority') in ['high', 'urgent'] or summary.get('urgency_score', 0) >= 0.7:
+            if priority in _URGENT_PRIORITIES or summary.get('urgency_score', 0) >= 0.7:
                 urgent_emails.append(summary)
             
             # Unread emails
@@ -162,14 +215,19 @@ class EmailScheduler:
             if not summary.get('is_replied', False) and summary.get('action_required', False):
                 response_reminders.append(summary)
         
+        # Emails handed to the natural-language summarizer, built once here
+        ai_input = urgent_emails[:]
+        ai_input.extend(unread_emails)
+        
         return {
             'date': datetime.now().strftime('%Y-%m-%d'),
             'total_emails': len(email_summaries),
-            'categories': categories,
+            'categories': dict(categories),
             'urgent_emails': urgent_emails,
             'unread_emails': unread_emails,
             'response_reminders': response_reminders,
-            'priority_breakdown': priority_breakdown
+            'priority_breakdown': dict(priority_breakdown),
+            'ai_input': ai_input
         }
     
     def _send_daily_notifications(self, daily_summary: dict):
@@ -177,31 +235,33 @@ class EmailScheduler:
         try:
             # Generate natural language summary
             ai_analyzer = self.processor.ai_analyzer
-            natural_summary = ai_analyzer.generate_natural_language_summary(
-                daily_summary.get('urgent_emails', []) + 
-                daily_summary.get('unread_emails', [])
-            )
+            ai_input = daily_summary.get('ai_input')
+            if ai_input is None:
+                ai_input = daily_summary.get('urgent_emails', []) + daily_summary.get('unread_emails', [])
+            natural_summary = ai_analyzer.generate_natural_language_summary(ai_input)
             
             # Prepare notification message
-            message = f"📧 Daily Email Summary - {daily_summary['date']}\n\n"
-            message += f"📊 Total emails: {daily_summary['total_emails']}\n"
+            parts = [
+                f"📧 Daily Email Summary - {daily_summary['date']}\n\n",
+                f"📊 Total emails: {daily_summary['total_emails']}\n"
+            ]
             
             if daily_summary['urgent_emails']:
-                message += f"⚠️ Urgent emails: {len(daily_summary['urgent_emails'])}\n"
+                parts.append(f"⚠️ Urgent emails: {len(daily_summary['urgent_emails'])}\n")
             
             if daily_summary['unread_emails']:
-                message += f"📬 Unread emails: {len(daily_summary['unread_emails'])}\n"
+                parts.append(f"📬 Unread emails: {len(daily_summary['unread_emails'])}\n")
             
             if daily_summary['response_reminders']:
-                message += f"🧾 Response reminders: {len(daily_summary['response_reminders'])}\n"
+                parts.append(f"🧾 Response reminders: {len(daily_summary['response_reminders'])}\n")
             
-            message += f"\n📝 Summary:\n{natural_summary}"
+            parts.append(f"\n📝 Summary:\n{natural_summary}")
             
-            # Send to all configured channels
-            self.notification_manager.send_notification("Daily Summary", message)
+            # Queue for all configured channels; the dispatcher retries failures
+            self.notification_manager.send_notification_background("Daily Summary", "".join(parts))
             
         except Exception as e:
-            print(f"Error sending daily notifications: {e}")
+            logger.error("Error sending daily notifications: %s", e)
     
     def _send_urgent_notifications(self, urgent_emails: list):
         """Send notifications for urgent emails"""
@@ -209,20 +269,22 @@ class EmailScheduler:
             if not urgent_emails:
                 return
             
-            message = f"⚠️ Urgent Email Alert - {datetime.now().strftime('%H:%M')}\n\n"
+            parts = [f"⚠️ Urgent Email Alert - {datetime.now().strftime('%H:%M')}\n\n"]
             
             for email in urgent_emails[:5]:  # Limit to 5 emails
-                message += f"📧 {email.get('subject', 'No subject')}\n"
-                message += f"   From: {email.get('sender', 'Unknown')}\n"
-                message += f"   Priority: {email.get('priority', 'Unknown')}\n\n"
+                parts.append(
+                    f"📧 {email.get('subject', 'No subject')}\n"
+                    f"   From: {email.get('sender', 'Unknown')}\n"
+                    f"   Priority: {email.get('priority', 'Unknown')}\n\n"
+                )
             
             if len(urgent_emails) > 5:
-                message += f"... and {len(urgent_emails) - 5} more urgent emails"
+                parts.append(f"... and {len(urgent_emails) - 5} more urgent emails")
             
-            self.notification_manager.send_notification("Urgent Emails", message)
+            self._queue_notification("Urgent Emails", "".join(parts))
             
         except Exception as e:
-            print(f"Error sending urgent notifications: {e}")
+            logger.error("Error sending urgent notifications: %s", e)
     
     def _send_reminder_notifications(self, reminder_emails: list):
         """Send notifications for response reminders"""
@@ -230,28 +292,61 @@ class EmailScheduler:
             if not reminder_emails:
                 return
             
-            message = f"🧾 Response Reminders - {datetime.now().strftime('%H:%M')}\n\n"
+            parts = [f"🧾 Response Reminders - {datetime.now().strftime('%H:%M')}\n\n"]
             
             for email in reminder_emails[:5]:  # Limit to 5 emails
-                message += f"📧 {email.get('subject', 'No subject')}\n"
-                message += f"   From: {email.get('sender', 'Unknown')}\n"
-                message += f"   Received: {email.get('received_at', 'Unknown')}\n\n"
+                parts.append(
+                    f"📧 {email.get('subject', 'No subject')}\n"
+                    f"   From: {email.get('sender', 'Unknown')}\n"
+                    f"   Received: {email.get('received_at', 'Unknown')}\n\n"
+                )
             
             if len(reminder_emails) > 5:
-                message += f"... and {len(reminder_emails) - 5} more emails need responses"
+                parts.append(f"... and {len(reminder_emails) - 5} more emails need responses")
             
-            self.notification_manager.send_notification("Response Reminders", message)
+            self._queue_notification("Response Reminders", "".join(parts))
             
         except Exception as e:
-            print(f"Error sending reminder notifications: {e}")
+            logger.error("Error sending reminder notifications: %s", e)
+    
+    def _queue_notification(self, title: str, message: str):
+        """Queue an alert, sending it with any others queued in the same batch window"""
+        with self._pending_lock:
+            self._pending.append((title, message))
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(NOTIFY_BATCH_SECONDS, self._flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _flush(self):
+        """Send the queued alerts, combined into one notification when there are several"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        
+        if not pending:
+            return
+        
+        try:
+            if len(pending) == 1:
+                self.notification_manager.send_notification_background(*pending[0])
+            else:
+                message = "\n\n".join(message for _, message in pending)
+                self.notification_manager.send_notification_background("Email Update", message)
+        except Exception as e:
+            logger.error("Error sending queued notifications: %s", e)
     
     def schedule_custom_task(self, task_func, schedule_time: str):
         """Schedule a custom task"""
         try:
             schedule.every().day.at(schedule_time).do(task_func)
-            print(f"Scheduled custom task at {schedule_time}")
+            # The loop may be sleeping past the new job's first run
+            self._wake.set()
+            logger.info("Scheduled custom task at %s", schedule_time)
         except Exception as e:
-            print(f"Error scheduling custom task: {e}")
+            logger.error("Error scheduling custom task: %s", e)
     
     def get_scheduled_jobs(self) -> list:
         """Get list of scheduled jobs"""
@@ -260,4 +355,4 @@ class EmailScheduler:
     def clear_schedule(self):
         """Clear all scheduled jobs"""
         schedule.clear()
-        print("Cleared all scheduled jobs") 
\ No newline at end of file
+        logger.info("Cleared all scheduled jobs") 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -20,6 +20,8 @@ class PriorityLevel(str, Enum):
     URGENT = "urgent"
 
 class EmailSummary(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore')
+
     id: str
     subject: str
     sender: str
@@ -35,6 +37,8 @@ class EmailSummary(BaseModel):
     follow_up_suggestions: List[str] = []
 
 class DailySummary(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     date: datetime
     total_emails: int
     categories: Dict[EmailCategory, int]
@@ -44,6 +48,8 @@ class DailySummary(BaseModel):
     priority_breakdown: Dict[PriorityLevel, int]
 
 class EmailConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     email_address: EmailStr
     password: str
     imap_server: str
@@ -58,6 +64,8 @@ class EmailConfig(BaseModel):
     follow_up_reminder_days: int = 3
 
 class NotificationConfig(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     slack_webhook_url: Optional[str] = None
     telegram_bot_token: Optional[str] = None
     telegram_chat_id: Optional[str] = None
@@ -66,17 +74,23 @@ class NotificationConfig(BaseModel):
     notification_channels: List[str] = []
 
 class AnalysisRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     date_range: Optional[str] = "today"
     include_archived: bool = False
     categories_filter: Optional[List[EmailCategory]] = None
     priority_filter: Optional[List[PriorityLevel]] = None
 
 class VoiceSummaryRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     summary_id: str
     voice_type: str = "en-US"
     speed: float = 1.0
 
 class FollowUpSuggestion(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     email_id: str
     suggestion: str
     confidence: float
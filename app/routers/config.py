@@ -1,7 +1,79 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Response, Request
+from typing import List, Dict, Any, Optional
+import asyncio
+import json
+import os
 from app.models import EmailConfig
 from app.core.database import db
+from app.core.email_processor import EmailProcessor
+from app.core.config_cache import get_cached
+from app.core.http_cache import encode_with_etag, conditional_response
+from app.core.defaults import EMAIL_DEFAULTS, NOTIFICATION_DEFAULTS, SYSTEM_DEFAULTS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Common providers and their settings, served as-is by /email-providers
+EMAIL_PROVIDERS = {
+    "providers": [
+        {
+            "name": "Gmail",
+            "imap_server": "imap.gmail.com",
+            "imap_port": 993,
+            "smtp_server": "smtp.gmail.com",
+            "smtp_port": 587,
+            "use_ssl": True,
+            "notes": "Requires app password for 2FA accounts"
+        },
+        {
+            "name": "Outlook/Hotmail",
+            "imap_server": "outlook.office365.com",
+            "imap_port": 993,
+            "smtp_server": "smtp-mail.outlook.com",
+            "smtp_port": 587,
+            "use_ssl": True,
+            "notes": "May require app password"
+        },
+        {
+            "name": "Yahoo",
+            "imap_server": "imap.mail.yahoo.com",
+            "imap_port": 993,
+            "smtp_server": "smtp.mail.yahoo.com",
+            "smtp_port": 587,
+            "use_ssl": True,
+            "notes": "Requires app password"
+        },
+        {
+            "name": "ProtonMail",
+            "imap_server": "127.0.0.1",
+            "imap_port": 1143,
+            "smtp_server": "127.0.0.1",
+            "smtp_port": 1025,
+            "use_ssl": False,
+            "notes": "Requires ProtonMail Bridge"
+        },
+        {
+            "name": "Custom",
+            "imap_server": "",
+            "imap_port": 993,
+            "smtp_server": "",
+            "smtp_port": 587,
+            "use_ssl": True,
+            "notes": "Enter your custom server settings"
+        }
+    ]
+}
+
+# The provider list never changes, so its JSON body is encoded once
+EMAIL_PROVIDERS_JSON = orjson.dumps(EMAIL_PROVIDERS) if orjson else json.dumps(EMAIL_PROVIDERS).encode()
+
+# Bytes read per step when walking back from the end of the log file
+LOG_READ_BLOCK = 8192
+
+# Seconds /test-email-connection waits for the IMAP login before reporting failure
+IMAP_TEST_TIMEOUT = 10.0
 
 router = APIRouter(
     prefix="/api/config",
@@ -10,27 +82,13 @@ router = APIRouter(
 )
 
 @router.get("/email", response_model=EmailConfig)
-async def get_email_config():
+async def get_email_config(request: Request):
     """Get current email configuration"""
     try:
-        config = db.get_configuration("email_config")
-        if not config:
-            # Return default configuration
-            config = {
-                "email_address": "",
-                "password": "",
-                "imap_server": "imap.gmail.com",
-                "imap_port": 993,
-                "smtp_server": "smtp.gmail.com",
-                "smtp_port": 587,
-                "use_ssl": True,
-                "vip_contacts": [],
-                "auto_categorize": True,
-                "daily_summary_time": "09:00",
-                "response_reminder_hours": 24,
-                "follow_up_reminder_days": 3
-            }
-        return EmailConfig(**config)
+        # Fall back to the default configuration
+        config = get_cached("email_config") or EMAIL_DEFAULTS
+        # Revalidated on every poll so a save shows at once; unchanged config is a bodiless 304
+        return conditional_response(request, encode_with_etag(EmailConfig(**config)), max_age=0)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -39,7 +97,7 @@ async def update_email_config(config: EmailConfig):
     """Update email configuration"""
     try:
         # Save to database
-        db.save_configuration("email_config", config.dict())
+        await asyncio.to_thread(db.save_configuration, "email_config", config.dict())
         return config
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -48,7 +106,7 @@ async def update_email_config(config: EmailConfig):
 async def get_vip_contacts():
     """Get list of VIP contacts"""
     try:
-        contacts = db.get_vip_contacts()
+        contacts = await asyncio.to_thread(db.get_vip_contacts)
         return {"contacts": contacts}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -57,7 +115,7 @@ async def get_vip_contacts():
 async def add_vip_contact(email: str, name: str = None, priority_level: str = "high"):
     """Add a VIP contact"""
     try:
-        db.add_vip_contact(email, name, priority_level)
+        await asyncio.to_thread(db.add_vip_contact, email, name, priority_level)
         return {"message": f"VIP contact {email} added successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -73,20 +131,11 @@ async def remove_vip_contact(email: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/system")
-async def get_system_config():
+async def get_system_config(request: Request):
     """Get system configuration"""
     try:
-        config = db.get_configuration("system_config")
-        if not config:
-            config = {
-                "auto_start": True,
-                "log_level": "INFO",
-                "max_emails_per_batch": 50,
-                "retention_days": 30,
-                "backup_enabled": False,
-                "backup_frequency": "daily"
-            }
-        return config
+        config = get_cached("system_config") or dict(SYSTEM_DEFAULTS)
+        return conditional_response(request, encode_with_etag(config), max_age=0)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -94,7 +143,7 @@ async def get_system_config():
 async def update_system_config(config: Dict[str, Any]):
     """Update system configuration"""
     try:
-        db.save_configuration("system_config", config)
+        await asyncio.to_thread(db.save_configuration, "system_config", config)
         return {"message": "System configuration updated successfully", "config": config}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -103,9 +152,6 @@ async def update_system_config(config: Dict[str, Any]):
 async def get_system_status():
     """Get system status and health information"""
     try:
-        from app.core.email_processor import EmailProcessor
-        from app.core.notification_manager import NotificationManager
-        
         status = {
             "database": "connected",
             "email_processor": "ready",
@@ -117,14 +163,14 @@ async def get_system_status():
         }
         
         # Check email configuration
-        email_config = db.get_configuration("email_config")
+        email_config = get_cached("email_config")
         if email_config and email_config.get("email_address"):
             status["email_configured"] = True
         else:
             status["email_configured"] = False
         
         # Check notification configuration
-        notification_config = db.get_configuration("notification_config")
+        notification_config = get_cached("notification_config")
         if notification_config:
             status["notifications_configured"] = bool(
                 notification_config.get("slack_webhook_url") or
@@ -143,15 +189,15 @@ async def get_system_status():
 async def test_email_connection():
     """Test email connection"""
     try:
-        from app.core.email_processor import EmailProcessor
-        
         processor = EmailProcessor()
         
-        # Try to connect to IMAP server
+        # Try to connect to IMAP server; the handshake runs in a worker thread so the event loop keeps serving
         try:
-            imap = processor.connect_imap()
-            imap.logout()
+            imap = await asyncio.wait_for(asyncio.to_thread(processor.connect_imap), timeout=IMAP_TEST_TIMEOUT)
+            await asyncio.to_thread(imap.logout)
             return {"message": "Email connection successful", "status": "connected"}
+        except asyncio.TimeoutError:
+            return {"message": "Email connection failed: connection timed out", "status": "failed"}
         except Exception as e:
             return {"message": f"Email connection failed: {str(e)}", "status": "failed"}
             
@@ -164,45 +210,18 @@ async def reset_configuration(config_type: str):
     try:
         if config_type == "email":
             # Reset email configuration
-            default_config = {
-                "email_address": "",
-                "password": "",
-                "imap_server": "imap.gmail.com",
-                "imap_port": 993,
-                "smtp_server": "smtp.gmail.com",
-                "smtp_port": 587,
-                "use_ssl": True,
-                "vip_contacts": [],
-                "auto_categorize": True,
-                "daily_summary_time": "09:00",
-                "response_reminder_hours": 24,
-                "follow_up_reminder_days": 3
-            }
-            db.save_configuration("email_config", default_config)
+            default_config = dict(EMAIL_DEFAULTS)
+            await asyncio.to_thread(db.save_configuration, "email_config", default_config)
             
         elif config_type == "notifications":
             # Reset notification configuration
-            default_config = {
-                "slack_webhook_url": "",
-                "telegram_bot_token": "",
-                "telegram_chat_id": "",
-                "whatsapp_webhook_url": "",
-                "enable_voice_summary": False,
-                "notification_channels": []
-            }
-            db.save_configuration("notification_config", default_config)
+            default_config = dict(NOTIFICATION_DEFAULTS)
+            await asyncio.to_thread(db.save_configuration, "notification_config", default_config)
             
         elif config_type == "system":
             # Reset system configuration
-            default_config = {
-                "auto_start": True,
-                "log_level": "INFO",
-                "max_emails_per_batch": 50,
-                "retention_days": 30,
-                "backup_enabled": False,
-                "backup_frequency": "daily"
-            }
-            db.save_configuration("system_config", default_config)
+            default_config = dict(SYSTEM_DEFAULTS)
+            await asyncio.to_thread(db.save_configuration, "system_config", default_config)
             
         else:
             raise HTTPException(status_code=400, detail="Invalid config type")
@@ -217,76 +236,57 @@ async def reset_configuration(config_type: str):
 @router.get("/email-providers")
 async def get_email_providers():
     """Get list of common email providers and their settings"""
-    return {
-        "providers": [
-            {
-                "name": "Gmail",
-                "imap_server": "imap.gmail.com",
-                "imap_port": 993,
-                "smtp_server": "smtp.gmail.com",
-                "smtp_port": 587,
-                "use_ssl": True,
-                "notes": "Requires app password for 2FA accounts"
-            },
-            {
-                "name": "Outlook/Hotmail",
-                "imap_server": "outlook.office365.com",
-                "imap_port": 993,
-                "smtp_server": "smtp-mail.outlook.com",
-                "smtp_port": 587,
-                "use_ssl": True,
-                "notes": "May require app password"
-            },
-            {
-                "name": "Yahoo",
-                "imap_server": "imap.mail.yahoo.com",
-                "imap_port": 993,
-                "smtp_server": "smtp.mail.yahoo.com",
-                "smtp_port": 587,
-                "use_ssl": True,
-                "notes": "Requires app password"
-            },
-            {
-                "name": "ProtonMail",
-                "imap_server": "127.0.0.1",
-                "imap_port": 1143,
-                "smtp_server": "127.0.0.1",
-                "smtp_port": 1025,
-                "use_ssl": False,
-                "notes": "Requires ProtonMail Bridge"
-            },
-            {
-                "name": "Custom",
-                "imap_server": "",
-                "imap_port": 993,
-                "smtp_server": "",
-                "smtp_port": 587,
-                "use_ssl": True,
-                "notes": "Enter your custom server settings"
-            }
-        ]
-    }
+    return Response(content=EMAIL_PROVIDERS_JSON, media_type="application/json")
+
+def _tail_lines(path: str, count: int) -> List[str]:
+    """Read the last count lines of a file, reading backwards from the end in blocks"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b""
+        # One extra newline so the first kept line is known to be whole
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(LOG_READ_BLOCK, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    return lines[-count:] if count > 0 else []
+
+def _parse_log_lines(lines: List[str]) -> List[Dict[str, Any]]:
+    """Parse lines written as "date time LEVEL logger: message" into log entries"""
+    logs = []
+    for line in lines:
+        parts = line.split(" ", 3)
+        if len(parts) == 4 and parts[3].partition(": ")[1]:
+            name, _, message = parts[3].partition(": ")
+            logs.append({
+                "timestamp": f"{parts[0]} {parts[1]}",
+                "level": parts[2],
+                "logger": name,
+                "message": message
+            })
+        elif logs:
+            # Traceback and other continuation lines belong to the entry above
+            logs[-1]["message"] += "\n" + line
+    return logs
 
 @router.get("/logs")
-async def get_system_logs(limit: int = 100):
-    """Get system logs (placeholder)"""
+async def get_system_logs(limit: int = 100, since: Optional[str] = None):
+    """Get the most recent system log entries, optionally only those at or after since"""
     try:
-        # This would typically read from log files
-        # For now, return placeholder logs
-        logs = [
-            {
-                "timestamp": "2024-01-01 09:00:00",
-                "level": "INFO",
-                "message": "Email agent started successfully"
-            },
-            {
-                "timestamp": "2024-01-01 09:05:00",
-                "level": "INFO",
-                "message": "Daily email processing completed"
-            }
-        ]
+        log_file = os.getenv("LOG_FILE")
+        if not log_file or not os.path.exists(log_file):
+            return {"logs": []}
+        
+        # Only the end of the file is read, however large it has grown
+        lines = await asyncio.to_thread(_tail_lines, log_file, limit)
+        logs = _parse_log_lines(lines)
+        if since:
+            logs = [entry for entry in logs if entry["timestamp"] >= since]
         
-        return {"logs": logs[:limit]}
+        return {"logs": logs[-limit:] if limit > 0 else []}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional, Dict, Any
+from collections import Counter
 from datetime import datetime, date, timedelta
+import asyncio
+import json
 import os
+import re
+import time
 
 from app.models import (
     EmailSummary, DailySummary, AnalysisRequest, 
@@ -9,7 +14,61 @@ from app.models import (
 )
 from app.core.email_processor import EmailProcessor
 from app.core.database import db
-from app.core.ai_analyzer import AIAnalyzer
+from app.core.cache import cached_by_date, single_flight
+from app.core.http_cache import encode_with_etag, conditional_response
+from app.core.ai_analyzer import ai_analyzer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_URGENT_PRIORITIES = frozenset({'high', 'urgent'})
+
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+INVALID_DATE = "Invalid date format. Use YYYY-MM-DD"
+
+# (epoch second, today's YYYY-MM-DD) so a burst of requests formats the date once
+_today_cache = (0, "")
+
+def _today() -> str:
+    """Get today's date as YYYY-MM-DD, formatting it at most once a second"""
+    global _today_cache
+    second = int(time.time())
+    if _today_cache[0] != second:
+        _today_cache = (second, datetime.now().strftime('%Y-%m-%d'))
+    return _today_cache[1]
+
+def _check_date(date_str: str) -> str:
+    """Reject anything that is not a real YYYY-MM-DD date with a 400"""
+    # The regex rejects malformed input cheaply; fromisoformat then rejects impossible days
+    try:
+        if _DATE_RE.fullmatch(date_str):
+            date.fromisoformat(date_str)
+            return date_str
+    except ValueError:
+        pass
+    raise HTTPException(status_code=400, detail=INVALID_DATE)
+
+def valid_date(date: str) -> str:
+    """Dependency validating the {date} path parameter"""
+    return _check_date(date)
+
+def _email_list_response(emails: List[Dict[str, Any]]) -> Response:
+    """Send stored email rows in EmailSummary's JSON form without validating each row again.
+    
+    Returning a Response skips response_model, which then only documents the schema.
+    """
+    # Rows were validated as EmailSummary before they were saved; only the timestamp is stored
+    # in SQLite's "YYYY-MM-DD HH:MM:SS" form, so it is rewritten the way the model serializes it
+    for email in emails:
+        email['received_at'] = datetime.fromisoformat(email['received_at']).isoformat()
+    body = orjson.dumps(emails) if orjson else json.dumps(emails).encode()
+    return Response(content=body, media_type="application/json")
+
+def optional_date(date_str: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")) -> str:
+    """Dependency validating an optional date query parameter, defaulting to today"""
+    return _check_date(date_str) if date_str else _today()
 
 router = APIRouter(
     prefix="/api/email",
@@ -17,23 +76,26 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+def _encoded_daily_summary(date_str: str):
+    """Validate and encode the stored summary for a date, or None when there is none"""
+    summary = db.get_daily_summary(date_str)
+    if not summary:
+        return None
+    
+    # The stored date is plain text
+    return encode_with_etag(DailySummary(**{**summary, "date": datetime.fromisoformat(summary["date"])}))
+
 @router.get("/summary/{date}", response_model=DailySummary)
-async def get_daily_summary(date_str: str):
+async def get_daily_summary(request: Request, date_str: str = Depends(valid_date)):
     """Get daily email summary for a specific date"""
     try:
-        # Validate date format
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        # Get summary from database
-        summary = db.get_daily_summary(date_str)
+        # Cached already encoded, so a repeat request only compares ETags
+        encoded = cached_by_date("daily_summary", date_str, lambda: _encoded_daily_summary(date_str))
         
-        if not summary:
+        if not encoded:
             raise HTTPException(status_code=404, detail="No summary found for this date")
         
-        return DailySummary(**summary)
+        return conditional_response(request, encoded)
         
     except HTTPException:
         raise
@@ -42,33 +104,22 @@ async def get_daily_summary(date_str: str):
 
 @router.get("/emails/{date}", response_model=List[EmailSummary])
 async def get_emails_by_date(
-    date_str: str,
+    date_str: str = Depends(valid_date),
     category: Optional[EmailCategory] = Query(None, description="Filter by category"),
     priority: Optional[PriorityLevel] = Query(None, description="Filter by priority"),
     limit: int = Query(50, description="Maximum number of emails to return")
 ):
     """Get emails for a specific date with optional filtering"""
     try:
-        # Validate date format
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        # Get emails from database
-        emails = db.get_emails_by_date(date_str)
+        # Filtered and limited in the database
+        emails = db.get_emails_filtered(
+            date_str,
+            category=category,
+            priorities=[priority] if priority else None,
+            limit=limit
+        )
         
-        # Apply filters
-        if category:
-            emails = [e for e in emails if e['category'] == category]
-        
-        if priority:
-            emails = [e for e in emails if e['priority'] == priority]
-        
-        # Apply limit
-        emails = emails[:limit]
-        
-        return [EmailSummary(**email) for email in emails]
+        return _email_list_response(emails)
         
     except HTTPException:
         raise
@@ -105,36 +156,40 @@ async def analyze_emails(request: AnalysisRequest):
                 if e['priority'] in request.priority_filter
             ]
         
-        # Generate analysis results
-        analysis_results = {
-            "date": target_date,
-            "total_emails": len(email_summaries),
-            "categories": {},
-            "priorities": {},
-            "urgent_emails": [],
-            "unread_emails": [],
-            "response_reminders": []
-        }
-        
         # Count categories and priorities
+        categories = Counter()
+        priorities = Counter()
+        urgent_emails = []
+        unread_emails = []
+        response_reminders = []
+        
         for email in email_summaries:
-            category = email['category']
             priority = email['priority']
-            
-            analysis_results['categories'][category] = analysis_results['categories'].get(category, 0) + 1
-            analysis_results['priorities'][priority] = analysis_results['priorities'].get(priority, 0) + 1
+            categories[email['category']] += 1
+            priorities[priority] += 1
             
             # Check for urgent emails
-            if email['priority'] in ['high', 'urgent'] or email['urgency_score'] >= 0.7:
-                analysis_results['urgent_emails'].append(email)
+            if priority in _URGENT_PRIORITIES or email['urgency_score'] >= 0.7:
+                urgent_emails.append(email)
             
             # Check for unread emails
             if not email['is_read']:
-                analysis_results['unread_emails'].append(email)
+                unread_emails.append(email)
             
             # Check for response reminders
             if not email['is_replied'] and email['action_required']:
-                analysis_results['response_reminders'].append(email)
+                response_reminders.append(email)
+        
+        # Generate analysis results
+        analysis_results = {
+            "date": target_date,
+            "total_emails": len(email_summaries),
+            "categories": dict(categories),
+            "priorities": dict(priorities),
+            "urgent_emails": urgent_emails,
+            "unread_emails": unread_emails,
+            "response_reminders": response_reminders
+        }
         
         return analysis_results
         
@@ -146,22 +201,18 @@ async def get_urgent_emails(limit: int = Query(10, description="Maximum number o
     """Get urgent emails that need immediate attention"""
     try:
         # Get today's emails
-        today = datetime.now().strftime('%Y-%m-%d')
-        emails = db.get_emails_by_date(today)
-        
-        # Filter for urgent emails
-        urgent_emails = [
-            e for e in emails 
-            if e['priority'] in ['high', 'urgent'] or e['urgency_score'] >= 0.7
-        ]
-        
-        # Sort by urgency score (highest first)
-        urgent_emails.sort(key=lambda x: x['urgency_score'], reverse=True)
+        today = _today()
         
-        # Apply limit
-        urgent_emails = urgent_emails[:limit]
+        # High or urgent priority, or a high urgency score; highest score first
+        urgent_emails = db.get_emails_filtered(
+            today,
+            priorities=['high', 'urgent'],
+            min_urgency=0.7,
+            order_by='urgency',
+            limit=limit
+        )
         
-        return [EmailSummary(**email) for email in urgent_emails]
+        return _email_list_response(urgent_emails)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -171,19 +222,12 @@ async def get_unread_emails(limit: int = Query(20, description="Maximum number o
     """Get unread emails"""
     try:
         # Get today's emails
-        today = datetime.now().strftime('%Y-%m-%d')
-        emails = db.get_emails_by_date(today)
+        today = _today()
         
-        # Filter for unread emails
-        unread_emails = [e for e in emails if not e['is_read']]
+        # Unread emails, newest first
+        unread_emails = db.get_emails_filtered(today, is_read=False, order_by='newest', limit=limit)
         
-        # Sort by received date (newest first)
-        unread_emails.sort(key=lambda x: x['received_at'], reverse=True)
-        
-        # Apply limit
-        unread_emails = unread_emails[:limit]
-        
-        return [EmailSummary(**email) for email in unread_emails]
+        return _email_list_response(unread_emails)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -193,50 +237,29 @@ async def get_response_reminders(limit: int = Query(10, description="Maximum num
     """Get emails that need responses"""
     try:
         # Get today's emails
-        today = datetime.now().strftime('%Y-%m-%d')
-        emails = db.get_emails_by_date(today)
-        
-        # Filter for emails that need responses
-        reminder_emails = [
-            e for e in emails 
-            if not e['is_replied'] and e['action_required']
-        ]
+        today = _today()
         
-        # Sort by received date (oldest first, as they need attention)
-        reminder_emails.sort(key=lambda x: x['received_at'])
+        # Emails that need responses, oldest first as they need attention
+        reminder_emails = db.get_emails_filtered(
+            today,
+            is_replied=False,
+            action_required=True,
+            order_by='oldest',
+            limit=limit
+        )
         
-        # Apply limit
-        reminder_emails = reminder_emails[:limit]
-        
-        return [EmailSummary(**email) for email in reminder_emails]
+        return _email_list_response(reminder_emails)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/categories", response_model=Dict[str, int])
-async def get_category_stats(date_str: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")):
+async def get_category_stats(request: Request, date_str: str = Depends(optional_date)):
     """Get email category statistics"""
     try:
-        if date_str:
-            # Validate date format
-            try:
-                datetime.strptime(date_str, '%Y-%m-%d')
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-            
-            emails = db.get_emails_by_date(date_str)
-        else:
-            # Get today's emails
-            today = datetime.now().strftime('%Y-%m-%d')
-            emails = db.get_emails_by_date(today)
-        
-        # Count categories
-        categories = {}
-        for email in emails:
-            category = email['category']
-            categories[category] = categories.get(category, 0) + 1
-        
-        return categories
+        # Counted in the database
+        encoded = cached_by_date("category_stats", date_str, lambda: encode_with_etag(db.count_emails_by(date_str, 'category')))
+        return conditional_response(request, encoded)
         
     except HTTPException:
         raise
@@ -244,29 +267,12 @@ async def get_category_stats(date_str: Optional[str] = Query(None, description="
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/priorities", response_model=Dict[str, int])
-async def get_priority_stats(date_str: Optional[str] = Query(None, description="Date in YYYY-MM-DD format")):
+async def get_priority_stats(request: Request, date_str: str = Depends(optional_date)):
     """Get email priority statistics"""
     try:
-        if date_str:
-            # Validate date format
-            try:
-                datetime.strptime(date_str, '%Y-%m-%d')
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-            
-            emails = db.get_emails_by_date(date_str)
-        else:
-            # Get today's emails
-            today = datetime.now().strftime('%Y-%m-%d')
-            emails = db.get_emails_by_date(today)
-        
-        # Count priorities
-        priorities = {}
-        for email in emails:
-            priority = email['priority']
-            priorities[priority] = priorities.get(priority, 0) + 1
-        
-        return priorities
+        # Counted in the database
+        encoded = cached_by_date("priority_stats", date_str, lambda: encode_with_etag(db.count_emails_by(date_str, 'priority')))
+        return conditional_response(request, encoded)
         
     except HTTPException:
         raise
@@ -295,31 +301,31 @@ async def mark_email_as_replied(email_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _natural_language_summary(date_str: str) -> Dict[str, Any]:
+    """Build the natural language summary response for a date"""
+    # Get emails for the date
+    emails = db.get_emails_by_date(date_str)
+    
+    if not emails:
+        return {"summary": f"No emails found for {date_str}"}
+    
+    # Generate natural language summary
+    summary = ai_analyzer.generate_natural_language_summary(emails)
+    
+    return {
+        "date": date_str,
+        "total_emails": len(emails),
+        "summary": summary
+    }
+
 @router.get("/natural-summary/{date}")
-async def get_natural_language_summary(date_str: str):
+async def get_natural_language_summary(date_str: str = Depends(valid_date)):
     """Get natural language summary of emails for a specific date"""
     try:
-        # Validate date format
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        # Get emails for the date
-        emails = db.get_emails_by_date(date_str)
-        
-        if not emails:
-            return {"summary": f"No emails found for {date_str}"}
-        
-        # Generate natural language summary
-        ai_analyzer = AIAnalyzer()
-        summary = ai_analyzer.generate_natural_language_summary(emails)
-        
-        return {
-            "date": date_str,
-            "total_emails": len(emails),
-            "summary": summary
-        }
+        # The AI call runs off the event loop, and concurrent requests for a date share one run
+        return await single_flight(f"natsum:{date_str}", lambda: asyncio.to_thread(
+            cached_by_date, "natural_summary", date_str, lambda: _natural_language_summary(date_str)
+        ))
         
     except HTTPException:
         raise
@@ -1,8 +1,48 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Response, Depends, Request
 from typing import Dict, Any, List
+from datetime import datetime
+import json
+import threading
 from app.models import NotificationConfig
-from app.core.notification_manager import NotificationManager
+from app.core.notification_manager import NotificationManager, get_notification_manager
+from app.core.email_processor import EmailProcessor
+from app.core.scheduler import EmailScheduler
 from app.core.database import db
+from app.core.config_cache import get_cached
+from app.core.http_cache import encode_with_etag, conditional_response
+from app.core.defaults import NOTIFICATION_DEFAULTS
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Supported channels and the settings each needs, served as-is by /channels
+NOTIFICATION_CHANNELS = {
+    "channels": [
+        {
+            "name": "slack",
+            "description": "Send notifications to Slack channel",
+            "config_required": ["slack_webhook_url"]
+        },
+        {
+            "name": "telegram",
+            "description": "Send notifications to Telegram chat",
+            "config_required": ["telegram_bot_token", "telegram_chat_id"]
+        },
+        {
+            "name": "whatsapp",
+            "description": "Send notifications to WhatsApp",
+            "config_required": ["whatsapp_webhook_url"]
+        }
+    ]
+}
+
+# The channel list never changes, so its JSON body is encoded once
+NOTIFICATION_CHANNELS_JSON = orjson.dumps(NOTIFICATION_CHANNELS) if orjson else json.dumps(NOTIFICATION_CHANNELS).encode()
+
+# Held while a daily summary run is processing the inbox, so repeat requests don't start another
+_daily_summary_lock = threading.Lock()
 
 router = APIRouter(
     prefix="/api/notifications",
@@ -11,39 +51,31 @@ router = APIRouter(
 )
 
 @router.get("/config", response_model=NotificationConfig)
-async def get_notification_config():
+async def get_notification_config(request: Request):
     """Get current notification configuration"""
     try:
-        config = db.get_configuration("notification_config")
-        if not config:
-            config = {
-                "slack_webhook_url": "",
-                "telegram_bot_token": "",
-                "telegram_chat_id": "",
-                "whatsapp_webhook_url": "",
-                "enable_voice_summary": False,
-                "notification_channels": []
-            }
-        return NotificationConfig(**config)
+        config = get_cached("notification_config") or NOTIFICATION_DEFAULTS
+        return conditional_response(request, encode_with_etag(NotificationConfig(**config)), max_age=0)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/config", response_model=NotificationConfig)
-async def update_notification_config(config: NotificationConfig):
+async def update_notification_config(
+    config: NotificationConfig,
+    notification_manager: NotificationManager = Depends(get_notification_manager)
+):
     """Update notification configuration"""
     try:
-        notification_manager = NotificationManager()
         notification_manager.update_config(config.dict())
         return config
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/test")
-async def test_notifications():
+async def test_notifications(notification_manager: NotificationManager = Depends(get_notification_manager)):
     """Test all configured notification channels"""
     try:
-        notification_manager = NotificationManager()
-        results = notification_manager.test_notifications()
+        results = await notification_manager.test_notifications_async()
         return {
             "message": "Test notifications sent",
             "results": results
@@ -55,12 +87,12 @@ async def test_notifications():
 async def send_custom_notification(
     title: str,
     message: str,
-    priority: str = "normal"
+    priority: str = "normal",
+    notification_manager: NotificationManager = Depends(get_notification_manager)
 ):
     """Send a custom notification"""
     try:
-        notification_manager = NotificationManager()
-        results = notification_manager.send_notification(title, message, priority)
+        results = await notification_manager.send_notification_async(title, message, priority)
         return {
             "message": "Notification sent",
             "results": results
@@ -68,13 +100,11 @@ async def send_custom_notification(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/daily-summary")
-async def send_daily_summary(background_tasks: BackgroundTasks):
-    """Send daily email summary notification"""
+def _run_daily_summary():
+    """Process today's emails and send the daily summary notification"""
+    if not _daily_summary_lock.acquire(blocking=False):
+        return
     try:
-        from app.core.email_processor import EmailProcessor
-        from app.core.scheduler import EmailScheduler
-        
         # Process today's emails
         processor = EmailProcessor()
         today = datetime.now().strftime('%Y-%m-%d')
@@ -86,46 +116,45 @@ async def send_daily_summary(background_tasks: BackgroundTasks):
             daily_summary = scheduler._generate_daily_summary(email_summaries)
             
             # Send notifications
-            notification_manager = NotificationManager()
-            results = notification_manager.send_daily_summary(daily_summary)
+            get_notification_manager().send_daily_summary(daily_summary)
             
-            return {
-                "message": "Daily summary sent",
-                "results": results,
-                "total_emails": len(email_summaries)
-            }
-        else:
-            return {
-                "message": "No emails to summarize",
-                "total_emails": 0
-            }
+    except Exception as e:
+        print(f"Error sending daily summary: {e}")
+    finally:
+        _daily_summary_lock.release()
+
+@router.post("/daily-summary")
+async def send_daily_summary(background_tasks: BackgroundTasks):
+    """Send daily email summary notification"""
+    try:
+        if _daily_summary_lock.locked():
+            return {"message": "Daily summary already in progress"}
+        
+        # Fetching, analyzing and sending take seconds, so they run after the response
+        background_tasks.add_task(_run_daily_summary)
+        
+        return {"message": "Daily summary scheduled"}
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/urgent-alert")
-async def send_urgent_alert():
+async def send_urgent_alert(
+    background_tasks: BackgroundTasks,
+    notification_manager: NotificationManager = Depends(get_notification_manager)
+):
     """Send urgent email alert"""
     try:
-        from app.core.email_processor import EmailProcessor
-        
-        # Get urgent emails
-        processor = EmailProcessor()
+        # Get urgent emails: high or urgent priority, or a high urgency score
         today = datetime.now().strftime('%Y-%m-%d')
-        emails = db.get_emails_by_date(today)
-        
-        urgent_emails = [
-            e for e in emails 
-            if e['priority'] in ['high', 'urgent'] or e['urgency_score'] >= 0.7
-        ]
+        urgent_emails = db.get_emails_filtered(today, priorities=['high', 'urgent'], min_urgency=0.7)
         
         if urgent_emails:
-            notification_manager = NotificationManager()
-            results = notification_manager.send_urgent_alert(urgent_emails)
+            # Posting to the channels happens after the response is sent
+            background_tasks.add_task(notification_manager.send_urgent_alert, urgent_emails)
             
             return {
-                "message": "Urgent alert sent",
-                "results": results,
+                "message": "Urgent alert scheduled",
                 "urgent_count": len(urgent_emails)
             }
         else:
@@ -138,28 +167,22 @@ async def send_urgent_alert():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/response-reminders")
-async def send_response_reminders():
+async def send_response_reminders(
+    background_tasks: BackgroundTasks,
+    notification_manager: NotificationManager = Depends(get_notification_manager)
+):
     """Send response reminder notifications"""
     try:
-        from app.core.email_processor import EmailProcessor
-        
         # Get emails that need responses
-        processor = EmailProcessor()
         today = datetime.now().strftime('%Y-%m-%d')
-        emails = db.get_emails_by_date(today)
-        
-        reminder_emails = [
-            e for e in emails 
-            if not e['is_replied'] and e['action_required']
-        ]
+        reminder_emails = db.get_emails_filtered(today, is_replied=False, action_required=True)
         
         if reminder_emails:
-            notification_manager = NotificationManager()
-            results = notification_manager.send_response_reminder(reminder_emails)
+            # Posting to the channels happens after the response is sent
+            background_tasks.add_task(notification_manager.send_response_reminder, reminder_emails)
             
             return {
-                "message": "Response reminders sent",
-                "results": results,
+                "message": "Response reminders scheduled",
                 "reminder_count": len(reminder_emails)
             }
         else:
@@ -174,31 +197,12 @@ async def send_response_reminders():
 @router.get("/channels")
 async def get_available_channels():
     """Get list of available notification channels"""
-    return {
-        "channels": [
-            {
-                "name": "slack",
-                "description": "Send notifications to Slack channel",
-                "config_required": ["slack_webhook_url"]
-            },
-            {
-                "name": "telegram",
-                "description": "Send notifications to Telegram chat",
-                "config_required": ["telegram_bot_token", "telegram_chat_id"]
-            },
-            {
-                "name": "whatsapp",
-                "description": "Send notifications to WhatsApp",
-                "config_required": ["whatsapp_webhook_url"]
-            }
-        ]
-    }
+    return Response(content=NOTIFICATION_CHANNELS_JSON, media_type="application/json")
 
 @router.get("/status")
-async def get_notification_status():
+async def get_notification_status(notification_manager: NotificationManager = Depends(get_notification_manager)):
     """Get status of notification channels"""
     try:
-        notification_manager = NotificationManager()
         config = notification_manager.get_config()
         
         status = {
@@ -221,5 +225,3 @@ async def get_notification_status():
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-from datetime import datetime  # Add this import at the top 
\ No newline at end of file
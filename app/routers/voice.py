@@ -1,14 +1,78 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi.responses import StreamingResponse, JSONResponse
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional, Tuple
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+import asyncio
+import hashlib
+import itertools
 import os
+import shutil
+import subprocess
 import tempfile
+import threading
+import time
 from gtts import gTTS
-from pydub import AudioSegment
 import uuid
 
 from app.models import VoiceSummaryRequest
 from app.core.database import db
+from app.core.http_cache import encode_with_etag, conditional_response
+
+_URGENT_PRIORITIES = frozenset({'high', 'urgent'})
+
+# Speed changes run as one ffmpeg process, so they are only available when it is on the PATH
+FFMPEG = shutil.which("ffmpeg")
+
+# Largest piece of ffmpeg output sent to the client at once
+AUDIO_CHUNK_SIZE = 8192
+
+# Blocking TTS requests and encoding run here; the size caps concurrent calls to Google TTS
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", "8"))
+_tts_pool = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+# Finished mp3s are kept in memory and on disk, keyed by text, language and speed
+AUDIO_CACHE_SIZE = 128
+AUDIO_CACHE_TTL = 86400
+AUDIO_CACHE_DIR = os.path.join(tempfile.gettempdir(), "voice_cache")
+# Seconds between sweeps of expired files from AUDIO_CACHE_DIR
+AUDIO_SWEEP_INTERVAL = 3600
+
+# key -> (mp3 bytes, expiry on the monotonic clock), least recently used first
+_audio_cache: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+_audio_cache_lock = threading.Lock()
+_last_sweep = 0.0
+
+# Queued renders, oldest first: job id -> (future of the mp3 bytes, download filename)
+VOICE_JOB_LIMIT = 64
+_voice_jobs: "OrderedDict[str, Tuple[Future, str]]" = OrderedDict()
+_voice_jobs_lock = threading.Lock()
+
+# Languages offered for TTS, served as-is by /languages
+SUPPORTED_LANGUAGES = {
+    "languages": [
+        {"code": "en-US", "name": "English (US)"},
+        {"code": "en-GB", "name": "English (UK)"},
+        {"code": "es-ES", "name": "Spanish"},
+        {"code": "fr-FR", "name": "French"},
+        {"code": "de-DE", "name": "German"},
+        {"code": "it-IT", "name": "Italian"},
+        {"code": "pt-BR", "name": "Portuguese (Brazil)"},
+        {"code": "ru-RU", "name": "Russian"},
+        {"code": "ja-JP", "name": "Japanese"},
+        {"code": "ko-KR", "name": "Korean"},
+        {"code": "zh-CN", "name": "Chinese (Simplified)"},
+        {"code": "hi-IN", "name": "Hindi"},
+        {"code": "ar-SA", "name": "Arabic"},
+        {"code": "nl-NL", "name": "Dutch"},
+        {"code": "sv-SE", "name": "Swedish"}
+    ]
+}
+
+# The list never changes, so its body and ETag are computed once and clients may keep it for a day
+SUPPORTED_LANGUAGES_RESPONSE = encode_with_etag(SUPPORTED_LANGUAGES)
+LANGUAGES_MAX_AGE = 86400
 
 router = APIRouter(
     prefix="/api/voice",
@@ -29,15 +93,10 @@ async def generate_voice_summary(request: VoiceSummaryRequest):
         # Generate text content
         text_content = _generate_summary_text(summary)
         
-        # Generate audio file
-        audio_file_path = await _generate_audio(text_content, request.voice_type, request.speed)
+        # Generate audio
+        chunks = await _generate_audio(text_content, request.voice_type, request.speed)
         
-        # Return audio file
-        return FileResponse(
-            audio_file_path,
-            media_type="audio/mpeg",
-            filename=f"email_summary_{request.summary_id}.mp3"
-        )
+        return _audio_response(chunks, f"email_summary_{request.summary_id}.mp3")
         
     except HTTPException:
         raise
@@ -48,7 +107,8 @@ async def generate_voice_summary(request: VoiceSummaryRequest):
 async def generate_daily_voice_summary(
     date: str,
     voice_type: str = "en-US",
-    speed: float = 1.0
+    speed: float = 1.0,
+    queue: bool = False
 ):
     """Generate voice summary for daily emails"""
     try:
@@ -61,15 +121,13 @@ async def generate_daily_voice_summary(
         # Generate text content
         text_content = _generate_daily_summary_text(emails, date)
         
-        # Generate audio file
-        audio_file_path = await _generate_audio(text_content, voice_type, speed)
+        if queue:
+            return _queue_audio(text_content, voice_type, speed, f"daily_summary_{date}.mp3")
+        
+        # Generate audio
+        chunks = await _generate_audio(text_content, voice_type, speed)
         
-        # Return audio file
-        return FileResponse(
-            audio_file_path,
-            media_type="audio/mpeg",
-            filename=f"daily_summary_{date}.mp3"
-        )
+        return _audio_response(chunks, f"daily_summary_{date}.mp3")
         
     except HTTPException:
         raise
@@ -79,18 +137,14 @@ async def generate_daily_voice_summary(
 @router.post("/urgent-alert")
 async def generate_urgent_voice_alert(
     voice_type: str = "en-US",
-    speed: float = 1.0
+    speed: float = 1.0,
+    queue: bool = False
 ):
     """Generate voice alert for urgent emails"""
     try:
         # Get today's urgent emails
         today = datetime.now().strftime('%Y-%m-%d')
-        emails = db.get_emails_by_date(today)
-        
-        urgent_emails = [
-            e for e in emails 
-            if e['priority'] in ['high', 'urgent'] or e['urgency_score'] >= 0.7
-        ]
+        urgent_emails = db.get_emails_filtered(today, priorities=['high', 'urgent'], min_urgency=0.7)
         
         if not urgent_emails:
             raise HTTPException(status_code=404, detail="No urgent emails found")
@@ -98,15 +152,13 @@ async def generate_urgent_voice_alert(
         # Generate text content
         text_content = _generate_urgent_alert_text(urgent_emails)
         
-        # Generate audio file
-        audio_file_path = await _generate_audio(text_content, voice_type, speed)
+        if queue:
+            return _queue_audio(text_content, voice_type, speed, f"urgent_alert_{today}.mp3")
+        
+        # Generate audio
+        chunks = await _generate_audio(text_content, voice_type, speed)
         
-        # Return audio file
-        return FileResponse(
-            audio_file_path,
-            media_type="audio/mpeg",
-            filename=f"urgent_alert_{today}.mp3"
-        )
+        return _audio_response(chunks, f"urgent_alert_{today}.mp3")
         
     except HTTPException:
         raise
@@ -124,157 +176,318 @@ async def generate_custom_voice(
         if not text.strip():
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-        # Generate audio file
-        audio_file_path = await _generate_audio(text, voice_type, speed)
+        # Generate audio
+        chunks = await _generate_audio(text, voice_type, speed)
         
-        # Return audio file
-        return FileResponse(
-            audio_file_path,
-            media_type="audio/mpeg",
-            filename=f"custom_voice_{uuid.uuid4().hex[:8]}.mp3"
-        )
+        return _audio_response(chunks, f"custom_voice_{uuid.uuid4().hex[:8]}.mp3")
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def _generate_audio(text: str, voice_type: str, speed: float) -> str:
-    """Generate audio file from text"""
+@router.get("/result/{job_id}")
+async def get_voice_result(job_id: str):
+    """Get the audio of a queued voice job, or a 202 while it is still rendering"""
+    with _voice_jobs_lock:
+        job = _voice_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Voice job not found")
+    
+    future, filename = job
+    if not future.done():
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "pending"})
+    if future.exception():
+        raise HTTPException(status_code=500, detail=f"Error generating audio: {future.exception()}")
+    
+    return _audio_response(iter([future.result()]), filename)
+
+def _audio_response(chunks: Iterator[bytes], filename: str) -> StreamingResponse:
+    """Stream mp3 chunks to the client as a download while they are generated"""
+    return StreamingResponse(
+        _in_pool(chunks),
+        media_type="audio/mpeg",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+async def _generate_audio(text: str, voice_type: str, speed: float) -> Iterator[bytes]:
+    """Start generating mp3 audio from text, returning its chunks as they are produced"""
     try:
-        # Create temporary file
-        temp_dir = tempfile.gettempdir()
-        temp_file = os.path.join(temp_dir, f"voice_{uuid.uuid4().hex}.mp3")
-        
-        # Generate speech
-        tts = gTTS(text=text, lang=voice_type, slow=False)
-        tts.save(temp_file)
-        
-        # Adjust speed if needed
-        if speed != 1.0:
-            audio = AudioSegment.from_mp3(temp_file)
-            # Speed up or slow down
-            if speed > 1.0:
-                # Speed up
-                audio = audio.speedup(playback_speed=speed)
-            else:
-                # Slow down
-                audio = audio.speedup(playback_speed=speed)
-            
-            audio.export(temp_file, format="mp3")
-        
-        return temp_file
-        
+        return await asyncio.get_running_loop().run_in_executor(_tts_pool, _start_audio, text, voice_type, speed)
     except Exception as e:
         raise Exception(f"Error generating audio: {str(e)}")
 
+def _start_audio(text: str, voice_type: str, speed: float) -> Iterator[bytes]:
+    """Serve cached audio or begin synthesizing it, returning once the first chunk is ready"""
+    if speed <= 0:
+        raise ValueError("Speed must be greater than 0")
+    if speed != 1.0 and not FFMPEG:
+        raise RuntimeError("Changing the speed requires ffmpeg on the server's PATH")
+    
+    key = _audio_key(text, voice_type, speed)
+    cached = _cached_audio(key)
+    if cached is not None:
+        return iter([cached])
+    
+    # gTTS requests and yields the speech one text segment at a time
+    chunks = gTTS(text=text, lang=voice_type, slow=False).stream()
+    
+    # Wait for the first segment here so a failed TTS request is still reported as an error
+    chunks = itertools.chain([next(chunks, b"")], chunks)
+    
+    # Adjust speed if needed
+    if speed != 1.0:
+        chunks = _ffmpeg_speed(chunks, speed)
+    return _caching(key, chunks)
+
+def _queue_audio(text: str, voice_type: str, speed: float, filename: str) -> JSONResponse:
+    """Render audio on the TTS pool and answer at once with a job id to poll"""
+    job_id = uuid.uuid4().hex
+    future = _tts_pool.submit(lambda: b"".join(_start_audio(text, voice_type, speed)))
+    with _voice_jobs_lock:
+        _voice_jobs[job_id] = (future, filename)
+        if len(_voice_jobs) > VOICE_JOB_LIMIT:
+            _voice_jobs.popitem(last=False)
+    
+    return JSONResponse(status_code=202, content={
+        "job_id": job_id,
+        "status": "pending",
+        "result_url": f"{router.prefix}/result/{job_id}"
+    })
+
+async def _in_pool(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Pull each chunk on the TTS pool, keeping network waits and encoding off the event loop"""
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(_tts_pool, next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        # Stops ffmpeg and skips caching when the client goes away mid-stream
+        close = getattr(chunks, "close", None)
+        if close:
+            try:
+                close()
+            except ValueError:
+                # Still running in a pool thread; it finishes on its own
+                pass
+
+def _audio_key(text: str, voice_type: str, speed: float) -> str:
+    """Cache key for the audio of text in a language at a speed"""
+    return hashlib.sha256(f"{text}|{voice_type}|{speed}".encode()).hexdigest()
+
+def _cached_audio(key: str) -> Optional[bytes]:
+    """Get cached mp3 bytes for key, checking memory before disk"""
+    now = time.monotonic()
+    with _audio_cache_lock:
+        entry = _audio_cache.get(key)
+        if entry is not None and entry[1] > now:
+            _audio_cache.move_to_end(key)
+            return entry[0]
+    
+    path = os.path.join(AUDIO_CACHE_DIR, f"{key}.mp3")
+    try:
+        if time.time() - os.path.getmtime(path) >= AUDIO_CACHE_TTL:
+            return None
+        with open(path, 'rb') as f:
+            audio = f.read()
+    except OSError:
+        return None
+    
+    _remember_audio(key, audio, now)
+    return audio
+
+def _remember_audio(key: str, audio: bytes, now: float):
+    """Add audio to the in-memory LRU, evicting the least recently used entry when full"""
+    with _audio_cache_lock:
+        _audio_cache[key] = (audio, now + AUDIO_CACHE_TTL)
+        _audio_cache.move_to_end(key)
+        if len(_audio_cache) > AUDIO_CACHE_SIZE:
+            _audio_cache.popitem(last=False)
+
+def _store_audio(key: str, audio: bytes):
+    """Cache finished audio in memory and on disk, sweeping expired files now and then"""
+    global _last_sweep
+    _remember_audio(key, audio, time.monotonic())
+    try:
+        os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+        path = os.path.join(AUDIO_CACHE_DIR, f"{key}.mp3")
+        # Written aside and renamed so a reader never sees a partial file
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(audio)
+        os.replace(temp_path, path)
+        
+        if time.monotonic() - _last_sweep >= AUDIO_SWEEP_INTERVAL:
+            _last_sweep = time.monotonic()
+            _sweep_audio_cache()
+    except OSError as e:
+        print(f"Failed to cache voice audio: {e}")
+
+def _sweep_audio_cache():
+    """Delete cached audio files older than AUDIO_CACHE_TTL"""
+    cutoff = time.time() - AUDIO_CACHE_TTL
+    for entry in os.scandir(AUDIO_CACHE_DIR):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            continue
+
+def _caching(key: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Pass chunks through, caching the whole mp3 once it has been sent in full"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    
+    # Not reached when the client disconnects mid-stream, so partial audio is never cached
+    if parts:
+        _store_audio(key, b"".join(parts))
+
+def _atempo_filter(speed: float) -> str:
+    """Build an ffmpeg atempo chain for speed; each atempo step must stay within 0.5-2.0"""
+    steps = []
+    while speed > 2.0:
+        steps.append(2.0)
+        speed /= 2.0
+    while speed < 0.5:
+        steps.append(0.5)
+        speed /= 0.5
+    steps.append(speed)
+    return ",".join(f"atempo={step:g}" for step in steps)
+
+def _atempo_command(speed: float) -> List[str]:
+    """ffmpeg command that time-stretches mp3 from stdin to stdout"""
+    return [FFMPEG, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+            "-filter:a", _atempo_filter(speed), "-f", "mp3", "pipe:1"]
+
+def _ffmpeg_speed(chunks: Iterator[bytes], speed: float) -> Iterator[bytes]:
+    """Pipe mp3 chunks through ffmpeg, yielding the re-timed audio as it is encoded"""
+    process = subprocess.Popen(_atempo_command(speed), stdin=subprocess.PIPE,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    # A failed TTS segment, re-raised once ffmpeg's output ends
+    errors = []
+    
+    def feed():
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+    
+    # Decode, time-stretch and encode in a single process; TTS segments are written as they arrive
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        while True:
+            data = process.stdout.read1(AUDIO_CHUNK_SIZE)
+            if not data:
+                break
+            yield data
+        
+        # ffmpeg also ends cleanly when its input stops early, so truncated audio must fail
+        # here, before _caching stores it
+        feeder.join()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with status {process.returncode}")
+        if errors:
+            raise errors[0]
+    finally:
+        # Also reached when the client disconnects mid-stream
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
 def _generate_summary_text(summary: Dict[str, Any]) -> str:
     """Generate text content from summary"""
-    text = f"Email Summary for {summary.get('date', 'today')}. "
-    text += f"You received {summary.get('total_emails', 0)} emails. "
+    parts = [
+        f"Email Summary for {summary.get('date', 'today')}. ",
+        f"You received {summary.get('total_emails', 0)} emails. "
+    ]
     
     # Add category breakdown
     categories = summary.get('categories', {})
     if categories:
-        text += "Emails are categorized as: "
-        category_list = [f"{count} {cat}" for cat, count in categories.items()]
-        text += ", ".join(category_list) + ". "
+        parts.append("Emails are categorized as: ")
+        parts.append(", ".join(f"{count} {cat}" for cat, count in categories.items()) + ". ")
     
     # Add urgent emails
     urgent_emails = summary.get('urgent_emails', [])
     if urgent_emails:
-        text += f"There are {len(urgent_emails)} urgent emails that need your attention. "
+        parts.append(f"There are {len(urgent_emails)} urgent emails that need your attention. ")
     
     # Add unread emails
     unread_emails = summary.get('unread_emails', [])
     if unread_emails:
-        text += f"You have {len(unread_emails)} unread emails. "
+        parts.append(f"You have {len(unread_emails)} unread emails. ")
     
     # Add response reminders
     response_reminders = summary.get('response_reminders', [])
     if response_reminders:
-        text += f"There are {len(response_reminders)} emails that need responses. "
+        parts.append(f"There are {len(response_reminders)} emails that need responses. ")
     
-    return text
+    return "".join(parts)
 
 def _generate_daily_summary_text(emails: list, date: str) -> str:
     """Generate text content for daily email summary"""
     if not emails:
         return f"No emails found for {date}."
     
-    text = f"Daily email summary for {date}. "
-    text += f"You received {len(emails)} emails. "
+    parts = [f"Daily email summary for {date}. ", f"You received {len(emails)} emails. "]
     
-    # Count categories
-    categories = {}
-    urgent_count = 0
-    unread_count = 0
-    
-    for email in emails:
-        category = email.get('category', 'other')
-        categories[category] = categories.get(category, 0) + 1
-        
-        if email.get('priority') in ['high', 'urgent'] or email.get('urgency_score', 0) >= 0.7:
-            urgent_count += 1
-        
-        if not email.get('is_read', False):
-            unread_count += 1
+    # Count categories, urgent and unread emails
+    categories = Counter(email.get('category', 'other') for email in emails)
+    urgent_count = sum(
+        1 for email in emails
+        if email.get('priority') in _URGENT_PRIORITIES or email.get('urgency_score', 0) >= 0.7
+    )
+    unread_count = sum(1 for email in emails if not email.get('is_read', False))
     
     # Add category breakdown
     if categories:
-        text += "Emails are categorized as: "
-        category_list = [f"{count} {cat}" for cat, count in categories.items()]
-        text += ", ".join(category_list) + ". "
+        parts.append("Emails are categorized as: ")
+        parts.append(", ".join(f"{count} {cat}" for cat, count in categories.items()) + ". ")
     
     # Add urgent emails
     if urgent_count > 0:
-        text += f"There are {urgent_count} urgent emails that need your attention. "
+        parts.append(f"There are {urgent_count} urgent emails that need your attention. ")
     
     # Add unread emails
     if unread_count > 0:
-        text += f"You have {unread_count} unread emails. "
+        parts.append(f"You have {unread_count} unread emails. ")
     
-    return text
+    return "".join(parts)
 
 def _generate_urgent_alert_text(urgent_emails: list) -> str:
     """Generate text content for urgent email alert"""
     if not urgent_emails:
         return "No urgent emails found."
     
-    text = f"Urgent email alert. You have {len(urgent_emails)} urgent emails. "
+    parts = [f"Urgent email alert. You have {len(urgent_emails)} urgent emails. "]
     
     # List top 3 urgent emails
-    for i, email in enumerate(urgent_emails[:3]):
-        text += f"Email {i+1}: {email.get('subject', 'No subject')} from {email.get('sender', 'Unknown')}. "
+    parts.extend(
+        f"Email {i+1}: {email.get('subject', 'No subject')} from {email.get('sender', 'Unknown')}. "
+        for i, email in enumerate(urgent_emails[:3])
+    )
     
     if len(urgent_emails) > 3:
-        text += f"And {len(urgent_emails) - 3} more urgent emails. "
+        parts.append(f"And {len(urgent_emails) - 3} more urgent emails. ")
     
-    text += "Please review these emails immediately."
+    parts.append("Please review these emails immediately.")
     
-    return text
+    return "".join(parts)
 
 @router.get("/languages")
-async def get_supported_languages():
+async def get_supported_languages(request: Request):
     """Get list of supported languages for TTS"""
-    return {
-        "languages": [
-            {"code": "en-US", "name": "English (US)"},
-            {"code": "en-GB", "name": "English (UK)"},
-            {"code": "es-ES", "name": "Spanish"},
-            {"code": "fr-FR", "name": "French"},
-            {"code": "de-DE", "name": "German"},
-            {"code": "it-IT", "name": "Italian"},
-            {"code": "pt-BR", "name": "Portuguese (Brazil)"},
-            {"code": "ru-RU", "name": "Russian"},
-            {"code": "ja-JP", "name": "Japanese"},
-            {"code": "ko-KR", "name": "Korean"},
-            {"code": "zh-CN", "name": "Chinese (Simplified)"},
-            {"code": "hi-IN", "name": "Hindi"},
-            {"code": "ar-SA", "name": "Arabic"},
-            {"code": "nl-NL", "name": "Dutch"},
-            {"code": "sv-SE", "name": "Swedish"}
-        ]
-    }
-
-from datetime import datetime 
\ No newline at end of file
+    return conditional_response(request, SUPPORTED_LANGUAGES_RESPONSE, max_age=LANGUAGES_MAX_AGE, public=True)
@@ -1,19 +1,50 @@
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 import uvicorn
 from datetime import datetime, timedelta
 import os
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
 
+try:
+    # ORJSONResponse only works when orjson is installed
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+
 from app.routers import email_analysis, notifications, voice, config
 from app.core.email_processor import EmailProcessor
 from app.core.scheduler import EmailScheduler
 from app.core.database import init_db
+from app.core.notification_manager import close_async_client
 
 load_dotenv()
 
+# Log records are handed to a background listener so request and scheduler threads never block on stream I/O
+_log_queue = queue.SimpleQueue()
+_log_formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+_log_handlers = [logging.StreamHandler()]
+if os.getenv("LOG_FILE"):
+    # Also kept on disk so /api/config/logs can show recent entries
+    _log_handlers.append(logging.FileHandler(os.getenv("LOG_FILE"), encoding="utf-8"))
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_listener = QueueListener(_log_queue, *_log_handlers)
+# The queue side only renders the message; the listener's formatter adds time, level and logger
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), handlers=[_queue_handler])
+# httpx logs every request at INFO
+logging.getLogger("httpx").setLevel(logging.WARNING)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 app = FastAPI(
     title="Intelligent Email Agent API",
     description="""
@@ -61,6 +92,7 @@ app = FastAPI(
     },
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=DefaultResponse,
     openapi_tags=[
         {
             "name": "Email Analysis",
@@ -107,6 +139,11 @@ async def startup_event():
     scheduler = EmailScheduler()
     scheduler.start()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close connections opened on the server's event loop"""
+    await close_async_client()
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve the main dashboard"""
@@ -118,7 +155,7 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
         "version": "1.0.0"
     }
 
@@ -6,8 +6,13 @@ Intelligent Email Agent - Startup Script
 import os
 import sys
 import uvicorn
+from importlib.util import find_spec
 from dotenv import load_dotenv
 
+# Faster event loop and HTTP parser when installed (uvloop has no Windows build)
+LOOP = "uvloop" if find_spec("uvloop") else "asyncio"
+HTTP = "httptools" if find_spec("httptools") else "h11"
+
 def main():
     """Main startup function"""
     # Load environment variables
@@ -17,12 +22,15 @@ def main():
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
     debug = os.getenv("DEBUG", "False").lower() == "true"
+    # Each worker runs its own scheduler and caches, so more than one is opt-in
+    workers = 1 if debug else int(os.getenv("WEB_CONCURRENCY", "1"))
     
     print("🚀 Starting Intelligent Email Agent...")
     print(f"📍 Server: http://{host}:{port}")
     print(f"📊 Dashboard: http://{host}:{port}/")
     print(f"📚 API Docs: http://{host}:{port}/docs")
     print(f"🔧 Debug Mode: {debug}")
+    print(f"⚙️  Workers: {workers} ({LOOP} loop, {HTTP} parser)")
     print("-" * 50)
     
     # Check for required environment variables
@@ -48,6 +56,9 @@ def main():
             host=host,
             port=port,
             reload=debug,
+            workers=workers,
+            loop=LOOP,
+            http=HTTP,
             log_level="info" if debug else "warning"
         )
     except KeyboardInterrupt:
@@ -69,11 +69,14 @@ def main():
     # Import and run uvicorn
     try:
         import uvicorn
+        from importlib.util import find_spec
         uvicorn.run(
             "main:app",
             host="0.0.0.0",
             port=8000,
             reload=True,
+            loop="uvloop" if find_spec("uvloop") else "asyncio",
+            http="httptools" if find_spec("httptools") else "h11",
             log_level="info"
         )
     except KeyboardInterrupt:
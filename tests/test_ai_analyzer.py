@@ -1,6 +1,18 @@
 import pytest
+import threading
 from unittest.mock import Mock, patch, MagicMock
 from app.core.ai_analyzer import AIAnalyzer
+from app.core.database import Database
+
+def stream_chunks(*parts):
+    """Build streamed completion chunks carrying the given text deltas"""
+    chunks = []
+    for part in parts:
+        chunk = Mock()
+        chunk.choices = [Mock()]
+        chunk.choices[0].delta.content = part
+        chunks.append(chunk)
+    return chunks
 
 class TestAIAnalyzer:
     """Test cases for AIAnalyzer class"""
@@ -27,7 +39,17 @@ class TestAIAnalyzer:
         urgency_score = analyzer.analyze_urgency(subject, body)
         
         assert urgency_score < 0.5
-    
+
+    @patch.dict('os.environ', {'OPENAI_API_KEY': ''})
+    @patch('app.core.ai_analyzer.openai')
+    def test_no_client_without_api_key(self, mock_openai):
+        """Test that key-less analyzers skip client construction"""
+        analyzer = AIAnalyzer()
+
+        assert analyzer.client is None
+        assert analyzer.generate_summary("Hello", "Just checking in.")
+        mock_openai.OpenAI.assert_not_called()
+
     @patch('app.core.ai_analyzer.openai')
     def test_analyze_urgency_with_openai(self, mock_openai):
         """Test urgency analysis with OpenAI integration"""
@@ -47,6 +69,150 @@ class TestAIAnalyzer:
         assert urgency_score > 0.0
         assert urgency_score <= 1.0
     
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    @patch('app.core.ai_analyzer.db')
+    @patch('app.core.ai_analyzer.openai')
+    def test_analyze_email_bundle_single_completion(self, mock_openai, mock_db):
+        """Test bundled analysis issues one completion per email"""
+        create = mock_openai.OpenAI.return_value.chat.completions.create
+        create.return_value = stream_chunks(
+            '{"urgency": 0.9, "summary": "Budget approval needed today.", ',
+            '"action_required": true, "sentiment": "urgent", ',
+            '"suggestions": ["Approve the budget", "Reply to finance"]}'
+        )
+        mock_db.get_cached_response.return_value = None
+        
+        analyzer = AIAnalyzer()
+        
+        subject = "Budget approval"
+        body = "Please approve the Q3 budget."
+        
+        result = analyzer.analyze_email_bundle(subject, body, "work")
+        
+        assert create.call_count == 1
+        assert result['summary'] == "Budget approval needed today."
+        assert result['sentiment'] == "urgent"
+        assert result['action_required'] is True
+        assert 0.0 < result['urgency'] <= 1.0
+        assert "Approve the budget" in result['suggestions']
+        
+        # Follow-up lookups for the same email reuse the bundle
+        analyzer.generate_summary(subject, body)
+        analyzer.analyze_sentiment(subject, body)
+        assert create.call_count == 1
+    
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    @patch('app.core.ai_analyzer.db')
+    @patch('app.core.ai_analyzer.openai')
+    def test_bundle_kept_per_thread(self, mock_openai, mock_db):
+        """Test analyzing another email on another thread doesn't replace this thread's bundle"""
+        create = mock_openai.OpenAI.return_value.chat.completions.create
+        create.return_value = stream_chunks(
+            '{"urgency": 0.6, "summary": "Sign the contract.", "action_required": true, '
+            '"sentiment": "neutral", "suggestions": []}'
+        )
+        mock_db.get_cached_response.return_value = None
+        
+        analyzer = AIAnalyzer()
+        subject, body = "Contract", "Please sign the contract."
+        analyzer._ai_bundle(subject, body, "work")
+        
+        other = threading.Thread(target=analyzer.analyze_email_bundle, args=("Other", "Unrelated email"))
+        other.start()
+        other.join()
+        
+        assert analyzer.generate_summary(subject, body) == "Sign the contract."
+        assert create.call_count == 2
+    
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    @patch('app.core.ai_analyzer.db')
+    @patch('app.core.ai_analyzer.openai')
+    def test_bundle_stream_stops_after_json_object(self, mock_openai, mock_db):
+        """Test the bundle stream is not read past the closing brace"""
+        chunks = iter(stream_chunks(
+            '{"urgency": 0.2, "summary": "Lunch", "action_required": false, ',
+            '"sentiment": "neutral", "suggestions": []}',
+            '\n\n\n'
+        ))
+        mock_openai.OpenAI.return_value.chat.completions.create.return_value = chunks
+        mock_db.get_cached_response.return_value = None
+        
+        result = AIAnalyzer().analyze_email_bundle("Lunch", "Lunch on Friday?")
+        
+        assert result['summary'] == "Lunch"
+        assert next(chunks).choices[0].delta.content == '\n\n\n'
+    
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    @patch('app.core.ai_analyzer.db')
+    @patch('app.core.ai_analyzer.openai')
+    def test_unfinished_stream_not_cached(self, mock_openai, mock_db):
+        """Test a stream that ends before stop() accepts it is returned but not cached"""
+        create = mock_openai.OpenAI.return_value.chat.completions.create
+        create.return_value = stream_chunks('{"urgency": 0.2, ', '"summary": "Lunch"')
+        mock_db.get_cached_response.return_value = None
+        
+        analyzer = AIAnalyzer()
+        content = analyzer._cached_chat([{"role": "user", "content": "Lunch?"}],
+                                        stop=analyzer._json_complete, temperature=0)
+        
+        assert content == '{"urgency": 0.2, "summary": "Lunch"'
+        mock_db.save_cached_response.assert_not_called()
+        assert not analyzer._responses
+    
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    @patch('app.core.ai_analyzer.db')
+    @patch('app.core.ai_analyzer.openai')
+    def test_invalid_bundle_not_cached(self, mock_openai, mock_db):
+        """Test a completion that doesn't parse falls back and is not cached"""
+        create = mock_openai.OpenAI.return_value.chat.completions.create
+        create.return_value = stream_chunks('{"summary": "No urgency given"}')
+        mock_db.get_cached_response.return_value = None
+        
+        analyzer = AIAnalyzer()
+        
+        assert analyzer.generate_summary("Lunch", "Lunch on Friday?") == "Email about: Lunch"
+        mock_db.save_cached_response.assert_not_called()
+        assert not analyzer._responses
+    
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    @patch('app.core.ai_analyzer.db')
+    @patch('app.core.ai_analyzer.openai')
+    def test_reanalysis_served_from_memory(self, mock_openai, mock_db):
+        """Test re-analyzing an email skips both the API and the database cache"""
+        create = mock_openai.OpenAI.return_value.chat.completions.create
+        create.return_value = stream_chunks(
+            '{"urgency": 0.6, "summary": "Sign the contract.", "action_required": true, '
+            '"sentiment": "neutral", "suggestions": []}'
+        )
+        mock_db.get_cached_response.return_value = None
+        
+        analyzer = AIAnalyzer()
+        body = "Please sign the contract."
+        first = analyzer.analyze_urgency("Contract", body)
+        analyzer.analyze_urgency("Other", "Unrelated email")
+        second = analyzer.analyze_urgency("Contract", body)
+        
+        assert first == second
+        assert create.call_count == 2
+        assert mock_db.get_cached_response.call_count == 2
+    
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    @patch('app.core.ai_analyzer.openai')
+    def test_bundle_served_from_response_cache(self, mock_openai, temp_db):
+        """Test repeated analysis of the same email is served from the cache"""
+        create = mock_openai.OpenAI.return_value.chat.completions.create
+        create.return_value = stream_chunks(
+            '{"urgency": 0.4, "summary": "Lunch on Friday.", "action_required": false, ',
+            '"sentiment": "positive", "suggestions": []}'
+        )
+        
+        with patch('app.core.ai_analyzer.db', Database(temp_db)):
+            first = AIAnalyzer().generate_summary("Lunch", "Shall we have lunch on Friday?")
+            second = AIAnalyzer().generate_summary("Lunch", "Shall we have lunch on Friday?")
+        
+        assert first == second == "Lunch on Friday."
+        assert create.call_count == 1
+    
     def test_generate_summary_fallback(self):
         """Test summary generation fallback"""
         analyzer = AIAnalyzer()
@@ -261,6 +427,30 @@ class TestAIAnalyzer:
         assert summary is not None
         assert len(summary) > 0
     
+    @patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'})
+    @patch('app.core.ai_analyzer.openai')
+    def test_natural_language_summary_memoized(self, mock_openai, temp_db):
+        """Test summarizing the same emails again skips the completion"""
+        create = mock_openai.OpenAI.return_value.chat.completions.create
+        create.return_value.choices = [Mock()]
+        create.return_value.choices[0].message.content = " One urgent work email. "
+        email_summaries = [
+            {
+                'subject': 'Test Email 1',
+                'sender': 'John Doe',
+                'category': 'work',
+                'priority': 'high',
+                'summary': 'Important work email'
+            }
+        ]
+        
+        with patch('app.core.ai_analyzer.db', Database(temp_db)):
+            first = AIAnalyzer().generate_natural_language_summary(email_summaries)
+            second = AIAnalyzer().generate_natural_language_summary(email_summaries)
+        
+        assert first == second == "One urgent work email."
+        assert create.call_count == 1
+    
     def test_fallback_summary(self):
         """Test fallback summary generation"""
         analyzer = AIAnalyzer()
@@ -1,8 +1,11 @@
 import pytest
+import threading
+import time
+from collections import OrderedDict
 from unittest.mock import Mock, patch, MagicMock
 from fastapi.testclient import TestClient
 from datetime import datetime
-from app.models import EmailCategory, PriorityLevel
+from app.models import EmailCategory, PriorityLevel, EmailSummary
 
 class TestEmailAnalysisRouter:
     """Test cases for email analysis router"""
@@ -118,6 +121,76 @@ class TestEmailAnalysisRouter:
             assert len(data) == 1
             assert data[0]['subject'] == 'Test Email'
     
+    def test_email_lists_match_model_serialization(self, client):
+        """Test stored rows are sent exactly as EmailSummary would serialize them"""
+        row = {
+            'id': 'email-1',
+            'subject': 'Test Email',
+            'sender': 'Test Sender',
+            'sender_email': 'test@example.com',
+            'received_at': '2024-01-01 10:00:00',
+            'category': EmailCategory.WORK.value,
+            'priority': PriorityLevel.HIGH.value,
+            'summary': 'Test summary',
+            'is_read': False,
+            'is_replied': False,
+            'urgency_score': 0.9,
+            'action_required': True,
+            'follow_up_suggestions': ['Reply today']
+        }
+        expected = [EmailSummary(**row).model_dump(mode='json')]
+        
+        for path in ["/api/email/emails/2024-01-01", "/api/email/urgent",
+                     "/api/email/unread", "/api/email/reminders"]:
+            with patch('app.routers.email_analysis.db.get_emails_filtered', return_value=[dict(row)]):
+                response = client.get(path)
+            
+            assert response.status_code == 200
+            assert response.json() == expected
+    
+    def test_get_daily_summary_returns_stored_row(self, client):
+        """Test /summary/{date} serves a stored row, whose date is plain text"""
+        with patch('app.routers.email_analysis.db.get_daily_summary') as mock_get:
+            mock_get.return_value = {
+                'id': 1,
+                'date': '2023-03-03',
+                'total_emails': 5,
+                'categories': {'work': 3, 'personal': 2},
+                'urgent_emails': [],
+                'unread_emails': [],
+                'response_reminders': [],
+                'priority_breakdown': {'low': 2, 'medium': 3}
+            }
+            
+            response = client.get("/api/email/summary/2023-03-03")
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data['date'] == '2023-03-03T00:00:00'
+            assert data['total_emails'] == 5
+            assert 'id' not in data
+    
+    def test_category_stats_not_modified(self, client):
+        """Test /categories answers a repeat poll carrying its ETag with an empty 304"""
+        with patch('app.routers.email_analysis.db.count_emails_by', return_value={'work': 3}):
+            response = client.get("/api/email/categories?date_str=2023-04-04")
+            assert response.status_code == 200
+            assert response.json() == {'work': 3}
+            
+            response = client.get("/api/email/categories?date_str=2023-04-04",
+                                  headers={"If-None-Match": response.headers["etag"]})
+            assert response.status_code == 304
+            assert response.content == b''
+    
+    def test_date_endpoints_reject_invalid_dates(self, client):
+        """Test malformed and impossible dates are rejected with a 400"""
+        for path in ["/api/email/summary/2024-13-01", "/api/email/emails/2024-02-30",
+                     "/api/email/natural-summary/today", "/api/email/categories?date_str=2024-1-1"]:
+            response = client.get(path)
+            
+            assert response.status_code == 400
+            assert response.json()['detail'] == "Invalid date format. Use YYYY-MM-DD"
+    
     def test_mark_email_as_read_endpoint(self, client, temp_db):
         """Test /emails/{email_id}/mark-read endpoint"""
         with patch('app.routers.email_analysis.EmailProcessor') as mock_processor_class:
@@ -206,6 +279,15 @@ class TestNotificationsRouter:
             data = response.json()
             assert data['success'] is True
     
+    def test_daily_summary_runs_in_background(self, client):
+        """Test /daily-summary responds before doing the work in a background task"""
+        with patch('app.routers.notifications._run_daily_summary') as mock_run:
+            response = client.post("/api/notifications/daily-summary")
+            
+            assert response.status_code == 200
+            assert response.json() == {"message": "Daily summary scheduled"}
+            mock_run.assert_called_once_with()
+    
     def test_send_urgent_email_notification_endpoint(self, client):
         """Test /urgent-email endpoint"""
         with patch('app.routers.notifications.NotificationManager') as mock_manager_class:
@@ -230,6 +312,13 @@ class TestNotificationsRouter:
 class TestVoiceRouter:
     """Test cases for voice router"""
     
+    @pytest.fixture(autouse=True)
+    def empty_audio_cache(self, tmp_path):
+        """Give each test its own empty voice audio cache"""
+        with patch('app.routers.voice.AUDIO_CACHE_DIR', str(tmp_path / "voice_cache")), \
+                patch('app.routers.voice._audio_cache', OrderedDict()):
+            yield
+    
     def test_generate_voice_summary_endpoint(self, client):
         """Test /generate-voice-summary endpoint"""
         with patch('app.routers.voice.text_to_speech') as mock_tts:
@@ -271,6 +360,196 @@ class TestVoiceRouter:
             data = response.json()
             assert len(data) == 2
             assert data[0]['name'] == 'en-US-Standard-A'
+    
+    def test_custom_voice_streams_audio(self, client):
+        """Test /custom streams the synthesized mp3 segments as a download"""
+        with patch('app.routers.voice.gTTS') as mock_gtts:
+            mock_gtts.return_value.stream.return_value = iter([b'ID3', b'audio'])
+            
+            response = client.post("/api/voice/custom", params={'text': 'Hello there'})
+            
+            assert response.status_code == 200
+            assert response.headers['content-type'] == 'audio/mpeg'
+            assert response.headers['content-disposition'].startswith('attachment; filename="custom_voice_')
+            assert response.content == b'ID3audio'
+            mock_gtts.return_value.save.assert_not_called()
+    
+    def test_custom_voice_reports_tts_failure(self, client):
+        """Test a TTS request that fails before any audio is sent still returns a 500"""
+        with patch('app.routers.voice.gTTS') as mock_gtts:
+            mock_gtts.return_value.stream.side_effect = Exception("TTS service error")
+            
+            response = client.post("/api/voice/custom", params={'text': 'Hello there'})
+            
+            assert response.status_code == 500
+            assert "TTS service error" in response.json()['detail']
+    
+    def test_speed_change_pipes_through_ffmpeg_atempo(self, client):
+        """Test speed changes stream through one ffmpeg atempo process, chaining steps outside 0.5-2.0"""
+        from app.routers.voice import _atempo_filter, _atempo_command
+        
+        assert _atempo_filter(1.5) == "atempo=1.5"
+        assert _atempo_filter(3.0) == "atempo=2,atempo=1.5"
+        assert _atempo_filter(0.25) == "atempo=0.5,atempo=0.5"
+        
+        with patch('app.routers.voice.FFMPEG', 'ffmpeg'):
+            command = _atempo_command(1.5)
+        assert command[command.index("-filter:a") + 1] == "atempo=1.5"
+        
+        # cat stands in for ffmpeg so the real pipe plumbing is exercised
+        with patch('app.routers.voice.gTTS') as mock_gtts, \
+                patch('app.routers.voice.FFMPEG', 'cat'), \
+                patch('app.routers.voice._atempo_command', return_value=['cat']):
+            mock_gtts.return_value.stream.return_value = iter([b'ID3', b'audio'] * 1000)
+            
+            response = client.post("/api/voice/custom", params={'text': 'Hello there', 'speed': 1.5})
+            
+            assert response.status_code == 200
+            assert response.content == b'ID3audio' * 1000
+    
+    def test_failed_ffmpeg_stream_not_cached(self):
+        """Test a TTS failure mid-stream or a failed ffmpeg raises instead of ending the audio"""
+        from app.routers import voice
+        
+        def stream():
+            yield b'ID3'
+            raise ConnectionError("TTS segment failed")
+        
+        with patch('app.routers.voice._store_audio') as store:
+            with patch('app.routers.voice._atempo_command', return_value=['cat']):
+                with pytest.raises(ConnectionError):
+                    list(voice._caching('key', voice._ffmpeg_speed(stream(), 1.5)))
+            
+            with patch('app.routers.voice._atempo_command', return_value=['sh', '-c', 'cat; exit 3']):
+                with pytest.raises(RuntimeError, match="status 3"):
+                    list(voice._caching('key', voice._ffmpeg_speed(iter([b'ID3audio']), 1.5)))
+        
+        store.assert_not_called()
+    
+    def test_voice_generation_runs_on_tts_pool(self, client):
+        """Test every TTS segment is requested on the TTS worker threads, not the event loop"""
+        threads = []
+        
+        def stream():
+            for chunk in (b'ID3', b'audio'):
+                threads.append(threading.current_thread().name)
+                yield chunk
+        
+        with patch('app.routers.voice.gTTS') as mock_gtts:
+            mock_gtts.return_value.stream.side_effect = stream
+            
+            response = client.post("/api/voice/custom", params={'text': 'Hello there'})
+            
+            assert response.content == b'ID3audio'
+            assert len(threads) == 2
+            assert all(name.startswith('tts') for name in threads)
+    
+    def test_queued_daily_voice_summary(self, client):
+        """Test queue=true answers 202 with a job id whose result is polled until the audio is ready"""
+        emails = [{'category': 'work', 'priority': 'high', 'urgency_score': 0.9, 'is_read': False}]
+        
+        with patch('app.routers.voice.db.get_emails_by_date', return_value=emails), \
+                patch('app.routers.voice.gTTS') as mock_gtts:
+            mock_gtts.return_value.stream.side_effect = lambda: iter([b'ID3', b'audio'])
+            
+            response = client.post("/api/voice/daily-summary",
+                                   params={'date': '2024-01-01', 'queue': True})
+            
+            assert response.status_code == 202
+            job = response.json()
+            assert job['status'] == 'pending'
+            assert job['result_url'] == f"/api/voice/result/{job['job_id']}"
+            
+            for _ in range(50):
+                response = client.get(job['result_url'])
+                if response.status_code != 202:
+                    break
+                time.sleep(0.01)
+            
+            assert response.status_code == 200
+            assert response.content == b'ID3audio'
+            assert response.headers['content-disposition'] == 'attachment; filename="daily_summary_2024-01-01.mp3"'
+        
+        assert client.get("/api/voice/result/unknown").status_code == 404
+    
+    def test_urgent_voice_alert_filters_in_query(self, client):
+        """Test the urgent alert asks the database for urgent emails only"""
+        emails = [{'subject': 'Outage', 'sender': 'Ops', 'priority': 'urgent', 'urgency_score': 0.9}]
+        
+        with patch('app.routers.voice.db.get_emails_filtered', return_value=emails) as mock_filtered, \
+                patch('app.routers.voice.gTTS') as mock_gtts:
+            mock_gtts.return_value.stream.side_effect = lambda: iter([b'ID3', b'audio'])
+            
+            response = client.post("/api/voice/urgent-alert")
+        
+        assert response.status_code == 200
+        assert response.content == b'ID3audio'
+        _, kwargs = mock_filtered.call_args
+        assert kwargs == {'priorities': ['high', 'urgent'], 'min_urgency': 0.7}
+    
+    def test_speed_change_without_ffmpeg(self, client):
+        """Test a speed change is refused with a clear error when ffmpeg is missing"""
+        with patch('app.routers.voice.gTTS') as mock_gtts, \
+                patch('app.routers.voice.FFMPEG', None):
+            response = client.post("/api/voice/custom", params={'text': 'Hello there', 'speed': 0.8})
+        
+        assert response.status_code == 500
+        assert "requires ffmpeg" in response.json()['detail']
+        mock_gtts.assert_not_called()
+    
+    def test_daily_summary_text_counts(self):
+        """Test the daily voice text counts categories, urgent and unread emails"""
+        from app.routers.voice import _generate_daily_summary_text
+        
+        emails = [
+            {'category': 'work', 'priority': 'urgent', 'urgency_score': 0.2, 'is_read': True},
+            {'category': 'personal', 'priority': 'low', 'urgency_score': 0.8, 'is_read': False},
+            {'category': 'work', 'priority': 'low', 'urgency_score': 0.1, 'is_read': False}
+        ]
+        
+        assert _generate_daily_summary_text(emails, '2024-01-01') == (
+            "Daily email summary for 2024-01-01. You received 3 emails. "
+            "Emails are categorized as: 2 work, 1 personal. "
+            "There are 2 urgent emails that need your attention. "
+            "You have 2 unread emails. "
+        )
+    
+    def test_languages_cached_by_clients(self, client):
+        """Test /languages is publicly cacheable for a day and revalidates to a 304"""
+        response = client.get("/api/voice/languages")
+        
+        assert response.status_code == 200
+        assert len(response.json()['languages']) == 15
+        assert response.headers['cache-control'] == 'public, max-age=86400'
+        
+        response = client.get("/api/voice/languages", headers={"If-None-Match": response.headers['etag']})
+        assert response.status_code == 304
+    
+    def test_repeat_voice_served_from_cache(self, client, tmp_path):
+        """Test repeated text is synthesized once, then served from memory and from disk"""
+        from app.routers import voice
+        
+        with patch('app.routers.voice.gTTS') as mock_gtts:
+            mock_gtts.return_value.stream.side_effect = lambda: iter([b'ID3', b'audio'])
+            
+            for _ in range(2):
+                response = client.post("/api/voice/custom", params={'text': 'Hello there'})
+                assert response.content == b'ID3audio'
+            assert mock_gtts.call_count == 1
+            assert len(list((tmp_path / "voice_cache").glob("*.mp3"))) == 1
+            
+            # A restart empties memory; the disk copy is still used
+            voice._audio_cache.clear()
+            response = client.post("/api/voice/custom", params={'text': 'Hello there'})
+            assert response.content == b'ID3audio'
+            assert mock_gtts.call_count == 1
+            
+            # A different speed is different audio
+            with patch('app.routers.voice.FFMPEG', 'ffmpeg'), \
+                    patch('app.routers.voice._ffmpeg_speed', side_effect=lambda chunks, speed: iter([b'ID3slow'])):
+                response = client.post("/api/voice/custom", params={'text': 'Hello there', 'speed': 0.8})
+            assert response.content == b'ID3slow'
+            assert mock_gtts.call_count == 2
 
 class TestConfigRouter:
     """Test cases for config router"""
@@ -325,6 +604,33 @@ class TestConfigRouter:
             data = response.json()
             assert data['success'] is True
     
+    def test_email_connection_times_out(self, client):
+        """Test a hanging IMAP login is reported as failed instead of blocking the request"""
+        with patch('app.routers.config.IMAP_TEST_TIMEOUT', 0.1), \
+                patch('app.core.email_processor.EmailProcessor.connect_imap', side_effect=lambda: time.sleep(1)):
+            response = client.post("/api/config/test-email-connection")
+            
+            assert response.status_code == 200
+            assert response.json() == {"message": "Email connection failed: connection timed out", "status": "failed"}
+    
+    def test_get_system_logs_reads_file_tail(self, client, tmp_path, monkeypatch):
+        """Test /logs returns the newest entries of LOG_FILE, keeping tracebacks with their entry"""
+        log_file = tmp_path / "agent.log"
+        log_file.write_text(
+            "".join(f"2024-01-01 09:00:0{i},000 INFO app.main: entry {i}\n" for i in range(5))
+            + "2024-01-01 09:00:05,000 ERROR app.main: failed\nTraceback (most recent call last):\n"
+        )
+        monkeypatch.setenv("LOG_FILE", str(log_file))
+        
+        with patch('app.routers.config.LOG_READ_BLOCK', 16):
+            response = client.get("/api/config/logs?limit=4&since=2024-01-01 09:00:04")
+        
+        assert response.status_code == 200
+        logs = response.json()["logs"]
+        assert [entry["level"] for entry in logs] == ["INFO", "ERROR"]
+        assert logs[0]["message"] == "entry 4"
+        assert logs[1]["message"] == "failed\nTraceback (most recent call last):"
+    
     def test_get_vip_contacts_endpoint(self, client, temp_db):
         """Test /vip-contacts endpoint (GET)"""
         with patch('app.routers.config.Database') as mock_db_class:
@@ -0,0 +1,86 @@
+import pytest
+import asyncio
+from unittest.mock import Mock, patch
+from app.core.database import Database
+from app.core import cache
+
+class TestDateCache:
+    """Test cases for the per-date result cache"""
+    
+    def test_cached_until_emails_written(self, temp_db):
+        """Test a date's result is reused until an email write invalidates it"""
+        cache_db = Database(temp_db)
+        compute = Mock(side_effect=[{'work': 1}, {'work': 2}])
+        
+        with patch('app.core.cache.db', cache_db):
+            assert cache.cached_by_date('category_stats', '2024-01-01', compute) == {'work': 1}
+            assert cache.cached_by_date('category_stats', '2024-01-01', compute) == {'work': 1}
+            assert compute.call_count == 1
+            
+            cache_db.save_email_summaries([{
+                'id': 'test-email-1',
+                'subject': 'Test Subject',
+                'sender': 'Test Sender',
+                'sender_email': 'test@example.com',
+                'received_at': '2024-01-01 10:00:00',
+                'category': 'work',
+                'priority': 'medium',
+                'summary': 'Test summary',
+                'is_read': False,
+                'is_replied': False,
+                'urgency_score': 0.5,
+                'action_required': False
+            }])
+            assert cache.cached_by_date('category_stats', '2024-01-01', compute) == {'work': 2}
+            assert compute.call_count == 2
+    
+    def test_today_expires_sooner(self, temp_db):
+        """Test today's results use the short TTL while past dates keep theirs"""
+        compute = Mock(return_value={})
+        
+        with patch('app.core.cache.db', Database(temp_db)), \
+                patch('app.core.cache.TODAY_TTL', 0):
+            cache.cached_by_date('priority_stats', '9999-12-31', compute)
+            cache.cached_by_date('priority_stats', '9999-12-31', compute)
+            cache.cached_by_date('priority_stats', '2000-01-01', compute)
+            cache.cached_by_date('priority_stats', '2000-01-01', compute)
+        
+        assert compute.call_count == 3
+
+class TestSingleFlight:
+    """Test cases for coalescing concurrent computations"""
+    
+    def test_concurrent_callers_share_one_run(self):
+        """Test callers arriving while a key is computing get its result, and later callers recompute"""
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {'summary': len(calls)}
+        
+        async def run():
+            first = await asyncio.gather(*(cache.single_flight('natsum:2024-01-01', compute) for _ in range(5)))
+            second = await cache.single_flight('natsum:2024-01-01', compute)
+            return first, second
+        
+        first, second = asyncio.run(run())
+        
+        assert first == [{'summary': 1}] * 5
+        assert second == {'summary': 2}
+        assert not cache._inflight
+    
+    def test_failure_reaches_every_caller(self):
+        """Test an exception from the shared run is raised to each waiting caller"""
+        async def compute():
+            await asyncio.sleep(0.05)
+            raise ValueError("AI unavailable")
+        
+        async def run():
+            return await asyncio.gather(*(cache.single_flight('natsum:2024-01-02', compute) for _ in range(3)),
+                                        return_exceptions=True)
+        
+        results = asyncio.run(run())
+        
+        assert all(isinstance(result, ValueError) for result in results)
+        assert not cache._inflight
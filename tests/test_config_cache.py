@@ -0,0 +1,35 @@
+import pytest
+from unittest.mock import patch
+from app.core.database import Database
+from app.core import config_cache
+
+class TestConfigCache:
+    """Test cases for the configuration cache"""
+    
+    def test_get_cached_reads_once_until_written(self, temp_db):
+        """Test repeated reads are served from memory until the config is saved"""
+        config_db = Database(temp_db)
+        config_db.save_configuration('system_config', {'log_level': 'INFO'})
+        
+        with patch('app.core.config_cache.db', config_db), \
+                patch.object(config_db, 'get_configuration', wraps=config_db.get_configuration) as get_config:
+            assert config_cache.get_cached('system_config') == {'log_level': 'INFO'}
+            config_cache.get_cached('system_config')['log_level'] = 'DEBUG'
+            assert config_cache.get_cached('system_config') == {'log_level': 'INFO'}
+            assert get_config.call_count == 1
+            
+            config_db.save_configuration('system_config', {'log_level': 'DEBUG'})
+            assert config_cache.get_cached('system_config') == {'log_level': 'DEBUG'}
+            assert get_config.call_count == 2
+    
+    def test_get_cached_expires_after_ttl(self, temp_db):
+        """Test a cached config is re-read once its TTL has passed"""
+        config_db = Database(temp_db)
+        
+        with patch('app.core.config_cache.db', config_db), \
+                patch('app.core.config_cache.TTL', 0), \
+                patch.object(config_db, 'get_configuration', return_value=None) as get_config:
+            config_cache.get_cached('email_config')
+            config_cache.get_cached('email_config')
+        
+        assert get_config.call_count == 2
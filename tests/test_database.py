@@ -1,7 +1,7 @@
 import pytest
 import json
 from datetime import datetime
-from app.core.database import Database
+from app.core.database import Database, SCHEMA_VERSION
 from app.models import EmailCategory, PriorityLevel
 
 class TestDatabase:
@@ -32,6 +32,19 @@ class TestDatabase:
         assert cursor.fetchone() is not None
         
         conn.close()
+
+    def test_init_database_skips_current_schema(self, temp_db):
+        """Test re-initializing a database that has the current schema runs no DDL"""
+        Database(temp_db)
+        db = Database(temp_db)
+
+        assert db._conn().execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+        statements = []
+        db._conn().set_trace_callback(statements.append)
+        db.init_database()
+
+        assert not any('CREATE' in sql for sql in statements)
     
     def test_save_email_summary(self, temp_db):
         """Test saving email summary"""
@@ -68,6 +81,37 @@ class TestDatabase:
         
         conn.close()
     
+    def test_save_email_summaries_bulk(self, temp_db):
+        """Test saving many email summaries in one call"""
+        db = Database(temp_db)
+        
+        email_summaries = [
+            {
+                'id': f'test-email-{i}',
+                'subject': f'Test Subject {i}',
+                'sender': 'Test Sender',
+                'sender_email': 'test@example.com',
+                'received_at': f'2024-01-01 1{i}:00:00',
+                'category': EmailCategory.WORK.value,
+                'priority': PriorityLevel.MEDIUM.value,
+                'summary': 'Test summary',
+                'is_read': False,
+                'is_replied': False,
+                'urgency_score': 0.5,
+                'action_required': False,
+                'follow_up_suggestions': ['Reply to email']
+            }
+            for i in range(3)
+        ]
+        
+        db.save_email_summaries(email_summaries)
+        
+        emails = db.get_emails_by_date('2024-01-01')
+        
+        assert len(emails) == 3
+        assert {e['id'] for e in emails} == {'test-email-0', 'test-email-1', 'test-email-2'}
+        assert emails[0]['follow_up_suggestions'] == ['Reply to email']
+    
     def test_save_daily_summary(self, temp_db):
         """Test saving daily summary"""
         db = Database(temp_db)
@@ -201,6 +245,74 @@ class TestDatabase:
         
         emails = db.get_emails_by_date('2024-01-01')
         assert len(emails) == 0
+
+    def test_iter_emails_by_date_pages(self, temp_db):
+        """Test paging through emails that share a received_at timestamp"""
+        db = Database(temp_db)
+
+        db.save_email_summaries([
+            {
+                'id': f'test-email-{i}',
+                'subject': f'Test Subject {i}',
+                'sender': 'Test Sender',
+                'sender_email': 'test@example.com',
+                'received_at': '2024-01-01 10:00:00',
+                'category': EmailCategory.WORK.value,
+                'priority': PriorityLevel.MEDIUM.value,
+                'summary': 'Test summary',
+                'is_read': False,
+                'is_replied': False,
+                'urgency_score': 0.5,
+                'action_required': False
+            }
+            for i in range(5)
+        ])
+
+        ids = [e['id'] for e in db.iter_emails_by_date('2024-01-01', page_size=2)]
+
+        assert len(ids) == 5
+        assert set(ids) == {f'test-email-{i}' for i in range(5)}
+
+    def test_get_emails_filtered(self, temp_db):
+        """Test filters, ordering and limit are applied in SQL"""
+        db = Database(temp_db)
+        
+        db.save_email_summaries([
+            {
+                'id': f'test-email-{i}',
+                'subject': f'Test Subject {i}',
+                'sender': 'Test Sender',
+                'sender_email': 'test@example.com',
+                'received_at': f'2024-01-01 1{i}:00:00',
+                'category': category,
+                'priority': priority,
+                'summary': 'Test summary',
+                'is_read': i == 0,
+                'is_replied': False,
+                'urgency_score': score,
+                'action_required': i != 1
+            }
+            for i, (category, priority, score) in enumerate([
+                ('work', 'high', 0.2),
+                ('work', 'low', 0.9),
+                ('personal', 'low', 0.1),
+                ('work', 'urgent', 0.5)
+            ])
+        ])
+        
+        urgent = db.get_emails_filtered('2024-01-01', priorities=['high', 'urgent'], min_urgency=0.7, order_by='urgency')
+        assert [e['id'] for e in urgent] == ['test-email-1', 'test-email-3', 'test-email-0']
+        
+        unread = db.get_emails_filtered('2024-01-01', category='work', is_read=False, limit=1)
+        assert [e['id'] for e in unread] == ['test-email-3']
+        
+        reminders = db.get_emails_filtered('2024-01-01', is_replied=False, action_required=True, order_by='oldest')
+        assert [e['id'] for e in reminders] == ['test-email-0', 'test-email-2', 'test-email-3']
+        
+        assert db.count_emails_by('2024-01-01', 'category') == {'work': 3, 'personal': 1}
+        assert db.count_emails_by('2024-01-01', 'priority') == {'high': 1, 'low': 2, 'urgent': 1}
+        with pytest.raises(ValueError):
+            db.count_emails_by('2024-01-01', 'subject')
     
     def test_get_nonexistent_configuration(self, temp_db):
         """Test getting non-existent configuration"""
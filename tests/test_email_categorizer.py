@@ -1,5 +1,6 @@
 import pytest
-from app.core.email_categorizer import EmailCategorizer
+from unittest.mock import patch
+from app.core.email_categorizer import EmailCategorizer, _S3FIFOCache
 from app.models import EmailCategory
 
 class TestEmailCategorizer:
@@ -111,20 +112,6 @@ class TestEmailCategorizer:
         category = categorizer._categorize_by_sender(sender_email)
         assert category == EmailCategory.PROMOTIONS
     
-    def test_has_keywords(self):
-        """Test keyword detection"""
-        categorizer = EmailCategorizer()
-        
-        text = "This email contains project and meeting keywords"
-        keywords = ['project', 'meeting', 'deadline']
-        
-        has_keywords = categorizer._has_keywords(text, keywords)
-        assert has_keywords is True
-        
-        text = "This email has no relevant keywords"
-        has_keywords = categorizer._has_keywords(text, keywords)
-        assert has_keywords is False
-    
     def test_get_category_confidence(self):
         """Test category confidence calculation"""
         categorizer = EmailCategorizer()
@@ -192,6 +179,17 @@ class TestEmailCategorizer:
         for keyword in original_keywords:
             assert keyword in categorizer.category_keywords[EmailCategory.WORK]
     
+    def test_update_keywords_affects_categorization(self):
+        """Test that added keywords are used by later categorizations"""
+        categorizer = EmailCategorizer()
+        
+        assert categorizer.categorize_email("Quarterly okr", "", "a@random.com") == EmailCategory.MEETINGS
+        assert categorizer.categorize_email("Okr sync", "", "a@random.com") == EmailCategory.OTHER
+        
+        categorizer.update_keywords(EmailCategory.WORK, ['okr'])
+        
+        assert categorizer.categorize_email("Okr sync", "", "a@random.com") == EmailCategory.WORK
+    
     def test_categorize_unknown_email(self):
         """Test categorization of unknown email type"""
         categorizer = EmailCategorizer()
@@ -204,6 +202,61 @@ class TestEmailCategorizer:
         
         assert category == EmailCategory.OTHER
     
+    def test_categorize_many_matches_single_categorization(self):
+        """Test batch categorization agrees with categorizing each email alone"""
+        categorizer = EmailCategorizer()
+        
+        items = [
+            ("URGENT: System Down", "Needs immediate attention.", "admin@company.com"),
+            ("Team Meeting Tomorrow", "See you at 2 PM.", "manager@company.com"),
+            ("Random Subject", "Random content.", "unknown@random.com"),
+            ("Hello", "", "noreply@facebook.com")
+        ]
+        
+        categories = categorizer.categorize_many(items)
+        
+        assert categories == [categorizer.categorize_email(*item) for item in items]
+        assert categories == [
+            EmailCategory.URGENT, EmailCategory.MEETINGS, EmailCategory.OTHER, EmailCategory.SOCIAL
+        ]
+    
+    def test_categorize_urgent_subject_skips_body(self):
+        """Test an urgent subject is categorized without lowercasing the body"""
+        categorizer = EmailCategorizer()
+        
+        class Body(str):
+            def lower(self):
+                raise AssertionError("body was lowercased")
+        
+        category = categorizer.categorize_email("URGENT: System Down", Body("Needs attention."), "admin@company.com")
+        
+        assert category == EmailCategory.URGENT
+    
+    def test_categorize_email_cache(self):
+        """Test repeated emails are served from the category cache"""
+        categorizer = EmailCategorizer()
+        
+        with patch.object(categorizer, '_categorize_uncached', wraps=categorizer._categorize_uncached) as scan:
+            assert categorizer.categorize_email("Re: Team Meeting", "See you", "a@random.com") == EmailCategory.MEETINGS
+            assert categorizer.categorize_email("Re: Team Meeting", "See you", "a@random.com") == EmailCategory.MEETINGS
+            assert scan.call_count == 1
+            
+            categorizer.categorize_email("Re: Team Meeting", "See you later", "a@random.com")
+            assert scan.call_count == 2
+    
+    def test_category_cache_survives_scan(self):
+        """Test a reused entry stays cached while one-shot entries stream through"""
+        cache = _S3FIFOCache(20)
+        cache.put('hot', EmailCategory.WORK)
+        cache.get('hot')
+        
+        for i in range(100):
+            cache.put(f'once-{i}', EmailCategory.OTHER)
+        
+        assert cache.get('hot') == EmailCategory.WORK
+        assert cache.get('once-0') is None
+        assert len(cache) <= 20
+    
     def test_categorize_email_with_mixed_keywords(self):
         """Test categorization when multiple category keywords are present"""
         categorizer = EmailCategorizer()
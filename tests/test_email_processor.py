@@ -1,7 +1,9 @@
 import pytest
+import email
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
 from app.core.email_processor import EmailProcessor
+from app.core.database import Database
 from app.models import EmailCategory, PriorityLevel
 
 class TestEmailProcessor:
@@ -152,6 +154,137 @@ class TestEmailProcessor:
         
         assert priority == PriorityLevel.LOW
     
+    def test_determine_priority_vip_cache(self, temp_db):
+        """Test VIP lookups are cached and refreshed when a VIP is added"""
+        vip_db = Database(temp_db)
+        vip_db.add_vip_contact('Boss@Example.com', 'Boss')
+        
+        with patch('app.core.email_processor.db', vip_db):
+            processor = EmailProcessor()
+            with patch.object(vip_db, 'get_vip_contacts', wraps=vip_db.get_vip_contacts) as get_vips:
+                assert processor._determine_priority(0.1, 'boss@example.com') == PriorityLevel.HIGH
+                assert processor._determine_priority(0.1, 'other@example.com') == PriorityLevel.LOW
+                assert get_vips.call_count == 1
+                
+                vip_db.add_vip_contact('other@example.com')
+                assert processor._determine_priority(0.1, 'other@example.com') == PriorityLevel.HIGH
+                assert get_vips.call_count == 2
+
+    def test_fetch_emails_single_bulk_fetch(self):
+        """Test all messages are fetched with one peeking FETCH command"""
+        raw = b'Subject: Hello\r\nFrom: Jane <jane@example.com>\r\nMessage-ID: <m1>\r\n\r\nBody'
+        mock_imap = Mock()
+        mock_imap.search.return_value = ('OK', [b'1 2'])
+        mock_imap.fetch.return_value = ('OK', [
+            (b'1 (BODY[] {%d}' % len(raw), raw), b')',
+            (b'2 (BODY[] {%d}' % len(raw), raw), b')'
+        ])
+
+        processor = EmailProcessor()
+        with patch.object(processor, 'connect_imap', return_value=mock_imap):
+            emails = processor.fetch_emails()
+
+        mock_imap.fetch.assert_called_once_with(b'1,2', '(BODY.PEEK[])')
+        assert len(emails) == 2
+        assert emails[0]['subject'] == 'Hello'
+
+    def test_fetch_emails_in_batches(self):
+        """Test large mailboxes are fetched in FETCH_BATCH sized commands"""
+        mock_imap = Mock()
+        mock_imap.search.return_value = ('OK', [b'1 2 3 4 5'])
+        mock_imap.fetch.return_value = ('OK', [])
+
+        processor = EmailProcessor()
+        with patch.object(processor, 'connect_imap', return_value=mock_imap), \
+                patch('app.core.email_processor.FETCH_BATCH', 2):
+            processor.fetch_emails(limit=None)
+
+        assert [c.args[0] for c in mock_imap.fetch.call_args_list] == [b'1,2', b'3,4', b'5']
+
+    def test_extract_body_uses_charset_and_skips_attachments(self):
+        """Test body extraction decodes with the part charset and ignores text attachments"""
+        raw = (
+            b'Content-Type: multipart/mixed; boundary="b"\r\n\r\n'
+            b'--b\r\nContent-Type: text/plain\r\nContent-Disposition: attachment; filename="a.txt"\r\n\r\nattached\r\n'
+            b'--b\r\nContent-Type: text/plain; charset="iso-8859-1"\r\n\r\nCaf\xe9 at noon\r\n'
+            b'--b--\r\n'
+        )
+        processor = EmailProcessor()
+
+        body = processor._extract_body(email.message_from_bytes(raw))
+
+        assert body.strip() == 'Café at noon'
+
+    def test_parse_email_quoted_sender(self):
+        """Test sender parsing handles quoted display names containing commas"""
+        message = email.message_from_string('From: "Doe, Jane" <Jane@Example.com>\nSubject: Hi\n\nBody')
+        processor = EmailProcessor()
+
+        parsed = processor._parse_email(message)
+
+        assert parsed['sender'] == 'Doe, Jane'
+        assert parsed['sender_email'] == 'jane@example.com'
+
+    def test_process_inbox_skips_failed_analysis(self, temp_db):
+        """Test concurrent analysis keeps inbox order and drops emails that fail"""
+        emails = [
+            {
+                'id': f'email-{i}',
+                'subject': f'Subject {i}',
+                'sender': 'Sender',
+                'sender_email': 'sender@example.com',
+                'received_at': datetime(2024, 1, 1, 10, i),
+                'body': 'Body'
+            }
+            for i in range(3)
+        ]
+        processor = EmailProcessor()
+        analyze_email = processor.analyze_email
+
+        def flaky_analyze(email_data, category=None):
+            if email_data['id'] == 'email-1':
+                raise ValueError('analysis failed')
+            return analyze_email(email_data, category)
+
+        inbox_db = Database(temp_db)
+        with patch('app.core.email_processor.db', inbox_db), \
+                patch.object(processor, 'fetch_emails', return_value=emails), \
+                patch.object(processor, 'analyze_email', side_effect=flaky_analyze), \
+                patch.object(inbox_db, 'save_email_summaries', wraps=inbox_db.save_email_summaries) as save:
+            summaries = processor.process_inbox('2024-01-01')
+
+        assert [s['id'] for s in summaries] == ['email-0', 'email-2']
+        save.assert_called_once()
+        assert {e['id'] for e in inbox_db.get_emails_by_date('2024-01-01')} == {'email-0', 'email-2'}
+
+    def test_process_inbox_reuses_stored_summaries(self, temp_db):
+        """Test emails analyzed on an earlier run are not analyzed again"""
+        emails = [
+            {
+                'id': f'email-{i}',
+                'subject': f'Subject {i}',
+                'sender': 'Sender',
+                'sender_email': 'sender@example.com',
+                'received_at': datetime(2024, 1, 1, 10, i),
+                'body': 'Body'
+            }
+            for i in range(3)
+        ]
+        processor = EmailProcessor()
+        inbox_db = Database(temp_db)
+
+        with patch('app.core.email_processor.db', inbox_db), \
+                patch.object(processor, 'analyze_email', wraps=processor.analyze_email) as analyze:
+            with patch.object(processor, 'fetch_emails', return_value=emails[:2]):
+                processor.process_inbox('2024-01-01')
+            with patch.object(processor, 'fetch_emails', return_value=emails):
+                all_summaries = processor.process_inbox('2024-01-01')
+                new_summaries = processor.process_inbox('2024-01-01', new_only=True)
+
+        assert analyze.call_count == 3
+        assert [s['id'] for s in all_summaries] == ['email-0', 'email-1', 'email-2']
+        assert new_summaries == []
+
     def test_process_emails_empty(self, temp_db):
         """Test processing empty email list"""
         config = {
@@ -0,0 +1,41 @@
+import pytest
+from starlette.requests import Request
+from app.core.http_cache import encode_with_etag, conditional_response
+from app.models import NotificationConfig
+
+def make_request(if_none_match=None):
+    """Build a bare GET request, optionally carrying If-None-Match"""
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+class TestConditionalResponse:
+    """Test cases for ETag conditional GETs"""
+    
+    def test_etag_follows_content(self):
+        """Test equal payloads share an ETag and models encode like their JSON dump"""
+        body, etag = encode_with_etag({'work': 3, 'personal': 1})
+        
+        assert encode_with_etag({'work': 3, 'personal': 1})[1] == etag
+        assert encode_with_etag({'work': 4, 'personal': 1})[1] != etag
+        assert etag.startswith('"') and etag.endswith('"')
+        
+        config = NotificationConfig(slack_webhook_url='https://hooks.slack.com/a')
+        assert encode_with_etag(config)[0] == config.model_dump_json().encode()
+    
+    def test_matching_etag_returns_304(self):
+        """Test a matching If-None-Match gets an empty 304 and anything else the body"""
+        encoded = encode_with_etag({'work': 3})
+        etag = encoded[1]
+        
+        response = conditional_response(make_request(), encoded)
+        assert response.status_code == 200
+        assert response.body == encoded[0]
+        assert response.headers['etag'] == etag
+        assert response.headers['cache-control'] == 'private, max-age=30'
+        
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            response = conditional_response(make_request(header), encoded, max_age=0)
+            assert response.status_code == 304
+            assert response.body == b''
+        
+        assert conditional_response(make_request('"other"'), encoded).status_code == 200
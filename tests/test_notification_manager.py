@@ -1,6 +1,12 @@
 import pytest
-from unittest.mock import Mock, patch, MagicMock
-from app.core.notification_manager import NotificationManager
+import time
+import asyncio
+from unittest.mock import Mock, AsyncMock, patch, MagicMock
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, ReadTimeoutError
+from app.core.notification_manager import (
+    NotificationManager, _outbox, _retry, _ahttp, close_async_client, get_notification_manager
+)
+from app.core.database import Database
 
 class TestNotificationManager:
     """Test cases for NotificationManager class"""
@@ -410,4 +416,156 @@ class TestNotificationManager:
         assert 'reminder' in message.lower()
         assert 'Project Update' in message
         assert 'colleague@company.com' in message
-        assert '25' in message  # hours since received 
\ No newline at end of file
+        assert '25' in message  # hours since received 
+    
+    @patch('app.core.notification_manager._session.post')
+    def test_channels_share_keep_alive_session(self, mock_post):
+        """Test every channel posts through the shared session"""
+        mock_post.return_value = Mock(status_code=200)
+        
+        manager = NotificationManager()
+        manager.config = {
+            'slack_webhook_url': 'https://hooks.slack.com/test',
+            'telegram_bot_token': 'test_token',
+            'telegram_chat_id': 'test_chat_id',
+            'whatsapp_webhook_url': 'https://whatsapp.example.com/hook'
+        }
+        
+        results = manager.send_notification("Title", "Message")
+        
+        assert results == {'slack': True, 'telegram': True, 'whatsapp': True}
+        assert mock_post.call_count == 3
+        # Emoji are sent as raw UTF-8 rather than escaped
+        telegram_body = next(c.kwargs['data'] for c in mock_post.call_args_list if 'telegram' in c.args[0])
+        assert '📧'.encode() in telegram_body
+    
+    def test_post_read_timeout_not_retried(self):
+        """Test a POST is retried after a failed connection but not after a read timeout"""
+        assert _retry.increment(method='POST', url='/hook', error=ConnectTimeoutError()).connect == 2
+        
+        with pytest.raises(MaxRetryError):
+            _retry.increment(method='POST', url='/hook', error=ReadTimeoutError(None, '/hook', 'timed out'))
+    
+    @patch('app.core.notification_manager.httpx.AsyncClient.post', new_callable=AsyncMock)
+    def test_send_notification_async_posts_configured_channels(self, mock_post):
+        """Test the async sender posts only to configured channels"""
+        mock_post.return_value = Mock(status_code=200)
+        
+        manager = NotificationManager()
+        manager.config = {
+            'slack_webhook_url': 'https://hooks.slack.com/test',
+            'whatsapp_webhook_url': 'https://whatsapp.example.com/hook'
+        }
+        
+        results = asyncio.run(manager.send_notification_async("Title", "Message", "urgent"))
+        
+        assert results == {'slack': True, 'whatsapp': True}
+        urls = {call.args[0] for call in mock_post.call_args_list}
+        assert urls == {'https://hooks.slack.com/test', 'https://whatsapp.example.com/hook'}
+    
+    def test_async_client_per_event_loop(self):
+        """Test each event loop gets its own async client, closed on shutdown"""
+        async def client_pair():
+            client = _ahttp()
+            assert _ahttp() is client
+            await close_async_client()
+            return client
+        
+        first = asyncio.run(client_pair())
+        second = asyncio.run(client_pair())
+        
+        assert first is not second
+        assert first.is_closed and second.is_closed
+    
+    def test_send_notification_async_times_out_slow_channel(self):
+        """Test a slow channel is reported failed without holding up the others"""
+        async def post(url, content):
+            if 'slack' in url:
+                await asyncio.sleep(1)
+            return Mock(status_code=200)
+        
+        manager = NotificationManager()
+        manager.config = {
+            'slack_webhook_url': 'https://hooks.slack.com/test',
+            'whatsapp_webhook_url': 'https://whatsapp.example.com/hook'
+        }
+        
+        with patch('app.core.notification_manager.httpx.AsyncClient.post', side_effect=post), \
+                patch('app.core.notification_manager.ASYNC_NOTIFY_TIMEOUT', 0.1):
+            results = asyncio.run(manager.send_notification_async("Title", "Message"))
+        
+        assert results == {'slack': False, 'whatsapp': True}
+    
+    def test_config_cached_until_updated(self, temp_db):
+        """Test managers share the stored config until a write invalidates it"""
+        config_db = Database(temp_db)
+        config_db.save_configuration('notification_config', {'slack_webhook_url': 'https://hooks.slack.com/a'})
+        
+        with patch('app.core.notification_manager.db', config_db), \
+                patch.object(config_db, 'get_configuration', wraps=config_db.get_configuration) as get_config, \
+                patch.object(config_db, 'save_configuration', wraps=config_db.save_configuration) as save_config:
+            manager = NotificationManager()
+            assert NotificationManager().config['slack_webhook_url'] == 'https://hooks.slack.com/a'
+            assert get_config.call_count == 1
+            
+            manager.update_config({'slack_webhook_url': 'https://hooks.slack.com/a'})
+            save_config.assert_not_called()
+            
+            manager.update_config({'slack_webhook_url': 'https://hooks.slack.com/b'})
+            assert NotificationManager().config['slack_webhook_url'] == 'https://hooks.slack.com/b'
+            assert get_config.call_count == 2
+
+    def test_shared_manager_reloads_saved_config(self, temp_db):
+        """Test the shared manager is built once and picks up configuration saved elsewhere"""
+        config_db = Database(temp_db)
+        config_db.save_configuration('notification_config', {'slack_webhook_url': 'https://hooks.slack.com/a'})
+        
+        with patch('app.core.notification_manager.db', config_db), \
+                patch('app.core.notification_manager._shared_manager', None):
+            manager = get_notification_manager()
+            assert get_notification_manager() is manager
+            assert manager.config['slack_webhook_url'] == 'https://hooks.slack.com/a'
+            
+            config_db.save_configuration('notification_config', {'slack_webhook_url': 'https://hooks.slack.com/b'})
+            assert get_notification_manager().config['slack_webhook_url'] == 'https://hooks.slack.com/b'
+
+    def test_telegram_request_uses_html(self):
+        """Test Telegram messages are HTML-escaped with bold markers converted"""
+        manager = NotificationManager()
+        manager.config = {'telegram_bot_token': 'test_token', 'telegram_chat_id': 'test_chat_id'}
+        
+        url, payload = manager._telegram_request("Re: a_b <c>", "📧 *Q&A*\nsnake_case")
+        
+        assert payload['parse_mode'] == 'HTML'
+        assert payload['text'] == "📧 <b>Re: a_b &lt;c&gt;</b>\n\n📧 <b>Q&amp;A</b>\nsnake_case"
+    
+    def test_background_send_retries_failed_channels(self):
+        """Test queued notifications retry only the channels that failed"""
+        manager = NotificationManager()
+        
+        with patch.object(manager, 'send_notification', side_effect=[
+                    {'slack': False, 'telegram': True},
+                    {'slack': True}
+                ]) as mock_send, \
+                patch('app.core.notification_manager.OUTBOX_BACKOFF', 0):
+            assert manager.send_notification_background("Title", "Message") is True
+            _outbox.join()
+        
+        assert mock_send.call_count == 2
+        assert mock_send.call_args.args == ("Title", "Message", "normal", ['slack'])
+    
+    def test_background_send_waits_for_slow_channel(self):
+        """Test a queued notification waits for a slow channel instead of posting to it again"""
+        manager = NotificationManager()
+        manager.config = {'slack_webhook_url': 'https://hooks.slack.com/test'}
+        
+        def slow_post(*args):
+            time.sleep(0.2)
+            return True
+        
+        with patch.object(manager, '_send_slack_notification', side_effect=slow_post) as mock_post, \
+                patch('app.core.notification_manager.NOTIFY_TIMEOUT', 0.05), \
+                patch('app.core.notification_manager.OUTBOX_BACKOFF', 0):
+            manager._dispatch("Title", "Message")
+        
+        assert mock_post.call_count == 1
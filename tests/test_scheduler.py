@@ -1,7 +1,10 @@
 import pytest
+import time
+import schedule
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 from app.core.scheduler import EmailScheduler
+from app.core.database import Database
 
 class TestEmailScheduler:
     """Test cases for EmailScheduler class"""
@@ -390,4 +393,92 @@ class TestEmailScheduler:
         }
         
         with pytest.raises(ValueError):
-            EmailScheduler(config) 
\ No newline at end of file
+            EmailScheduler(config)
+    
+    def test_generate_daily_summary_counts(self):
+        """Test the daily summary tallies categories, priorities and urgent emails"""
+        scheduler = EmailScheduler()
+        summaries = [
+            {'category': 'work', 'priority': 'high', 'urgency_score': 0.2, 'is_read': True},
+            {'category': 'work', 'priority': 'low', 'urgency_score': 0.9, 'is_read': False},
+            {'priority': 'low', 'urgency_score': 0.1, 'is_read': True}
+        ]
+        
+        daily_summary = scheduler._generate_daily_summary(summaries)
+        
+        assert daily_summary['categories'] == {'work': 2, 'other': 1}
+        assert daily_summary['priority_breakdown'] == {'high': 1, 'low': 2}
+        assert daily_summary['urgent_emails'] == summaries[:2]
+        assert daily_summary['unread_emails'] == [summaries[1]]
+        assert daily_summary['ai_input'] == [summaries[0], summaries[1], summaries[1]]
+        assert type(daily_summary['categories']) is dict
+    
+    def test_stop_wakes_sleeping_loop(self):
+        """Test stop returns promptly instead of waiting out the loop's sleep"""
+        scheduler = EmailScheduler()
+        scheduler.start()
+        time.sleep(0.1)
+        
+        started = time.monotonic()
+        scheduler.stop()
+        schedule.clear()
+        
+        assert time.monotonic() - started < 5
+        assert not scheduler.thread.is_alive()
+    
+    def test_collaborators_built_lazily(self):
+        """Test the processor and notification manager are only built when first used"""
+        with patch('app.core.scheduler.EmailProcessor') as processor_cls, \
+                patch('app.core.scheduler.NotificationManager') as manager_cls:
+            scheduler = EmailScheduler()
+            processor_cls.assert_not_called()
+            manager_cls.assert_not_called()
+            
+            assert scheduler.processor is scheduler.processor
+            processor_cls.assert_called_once()
+            manager_cls.assert_not_called()
+    
+    def test_email_config_cached_until_written(self, temp_db):
+        """Test the scheduler re-reads the email config only after a configuration write"""
+        config_db = Database(temp_db)
+        config_db.save_configuration('email_config', {'response_reminder_hours': 12})
+        
+        with patch('app.core.scheduler.db', config_db), \
+                patch.object(config_db, 'get_configuration', wraps=config_db.get_configuration) as get_config:
+            scheduler = EmailScheduler()
+            assert scheduler._email_config()['response_reminder_hours'] == 12
+            assert scheduler._email_config()['response_reminder_hours'] == 12
+            assert get_config.call_count == 1
+            
+            config_db.save_configuration('email_config', {'response_reminder_hours': 6})
+            assert scheduler._email_config()['response_reminder_hours'] == 6
+            assert get_config.call_count == 2
+    
+    def test_purge_response_cache(self, temp_db):
+        """Test the daily purge drops expired AI responses and keeps live ones"""
+        cache_db = Database(temp_db)
+        cache_db.save_cached_response(b'expired', 'old', ttl=0)
+        cache_db.save_cached_response(b'live', 'new', ttl=3600)
+        
+        with patch('app.core.scheduler.db', cache_db):
+            EmailScheduler()._purge_response_cache()
+        
+        rows = cache_db._conn().execute("SELECT key FROM openai_cache").fetchall()
+        assert [row['key'] for row in rows] == [b'live']
+    
+    def test_alerts_in_one_window_sent_together(self):
+        """Test urgent and reminder alerts queued together go out as one notification"""
+        scheduler = EmailScheduler()
+        scheduler.notification_manager = Mock()
+        emails = [{'subject': 'Server down', 'sender': 'Ops', 'priority': 'urgent', 'received_at': '10:00'}]
+        
+        with patch('app.core.scheduler.NOTIFY_BATCH_SECONDS', 0.2):
+            scheduler._send_urgent_notifications(emails)
+            timer = scheduler._flush_timer
+            scheduler._send_reminder_notifications(emails)
+            timer.join()
+        
+        scheduler.notification_manager.send_notification_background.assert_called_once()
+        title, message = scheduler.notification_manager.send_notification_background.call_args.args
+        assert title == "Email Update"
+        assert "Urgent Email Alert" in message and "Response Reminders" in message